@@ -0,0 +1,726 @@
+import argparse
+import asyncio
+import collections
+import hashlib
+import math
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+import engine
+import entities
+from replay import read_varint, write_varint
+import telemetry
+
+# Arena: one process runs many HumanVsAi games, each a session, and thin clients only draw
+# them. The server is an asyncio loop that steps every running session once per fixed step
+# and sends each client a tick message about its session. Clients join a session over a
+# local TCP or Unix socket, send the player's key presses and mirror the game from the ticks
+# with MirrorGame, which HumanVsAi.py --connect draws with the usual game view.
+#
+# Ticks are deltas against what the client already has. Enemies and missiles are sent as
+# quantized positions and speeds when they first appear, after that both sides move them
+# by their speed every tick and only entities that end up somewhere else are sent again,
+# then their ids once they are gone. Ships, score, wave and game over are only sent when
+# they change, so a quiet tick is a few bytes.
+#
+# Messages are a 4 byte little-endian length followed by the payload, whose first byte is
+# its type:
+#     join    (client): session (varint)
+#     input   (client): action << 1 | pressed
+#     welcome (server): session, human, seed, AI boards (varints), then one byte per AI board
+#                       with its level (0 if it ramps with the waves)
+#     tick    (server): flags, then the sections the flags say are there:
+#         score (zigzag varint), wave (varint), game over (byte)
+#         ships:   count, then board, x (zigzag), alive | out << 1 for each ship that changed
+#         removed: count, then the id of each enemy or missile that is gone
+#         records: count, then id, board << 2 | kind, x, y, change_x, change_y (zigzag)
+#                  for each one that is new or not where moving it put it
+#         events:  count, then type, board, x, y (zigzag) for each kill and death
+# All positions and speeds are in units of QUANTUM pixels.
+
+MESSAGE_JOIN = 1
+MESSAGE_INPUT = 2
+MESSAGE_WELCOME = 3
+MESSAGE_TICK = 4
+
+# Which sections a tick has
+TICK_SCORE = 1
+TICK_WAVE = 2
+TICK_GAME_OVER = 4
+TICK_FINISHED = 8
+TICK_SHIPS = 16
+TICK_REMOVED = 32
+TICK_RECORDS = 64
+TICK_EVENTS = 128
+
+EVENT_KILL = 1
+EVENT_DEATH = 2
+
+LENGTH = struct.Struct('<I')
+# Positions and speeds are sent in quarter pixels. Enemies and missiles move by whole
+# quarter pixels every step, so moving them on the client lands on the same spots
+QUANTUM = 0.25
+
+DEFAULT_PORT = 2140
+# Longest message a client sends, anything longer isn't from a client and the connection is closed
+MAX_CLIENT_MESSAGE = 16
+# Actions an input message can hold
+CLIENT_ACTIONS = (engine.INPUT_LEFT, engine.INPUT_RIGHT, engine.INPUT_FIRE)
+# Bytes a client may fall behind by before it is dropped, so one stuck client can't make
+# the server buffer without end
+MAX_CLIENT_BUFFER = 1 << 20
+# Steps the server may fall behind by before it gives up catching up and drops them
+MAX_LAG_STEPS = 5
+# Seconds between the server's stats lines
+STATS_INTERVAL = 5.0
+# Ticks a client holds back before drawing, to ride out uneven delivery, and the most it
+# lets pile up before it skips ahead
+BUFFER_TICKS = 2
+MAX_BUFFER_TICKS = 8
+
+# Where an explosion goes off on a client, MirrorGame events hold these instead of enemies
+Spot = collections.namedtuple('Spot', 'position')
+
+
+def write_signed(buffer, value):
+    """ Appends a signed integer to buffer as a zigzag varint """
+    write_varint(buffer, value << 1 if value >= 0 else (-value << 1) - 1)
+
+
+def read_signed(data, offset):
+    """ Reads an integer written by write_signed, returns (value, next offset) """
+    value, offset = read_varint(data, offset)
+    return (value >> 1) ^ -(value & 1), offset
+
+
+def quantize(value):
+    return round(value / QUANTUM)
+
+
+def parse_address(text):
+    """
+    Reads an address given on the command line
+    Parameters:
+        - text (str): unix:PATH for a Unix socket, HOST:PORT or PORT for TCP
+    Returns:
+        tuple: ('unix', path) or ('tcp', host, port)
+    """
+    if text.startswith('unix:'):
+        return 'unix', text[len('unix:'):]
+    host, _, port = text.rpartition(':')
+    return 'tcp', host or '127.0.0.1', int(port)
+
+
+def welcome_message(session, game):
+    message = bytearray([MESSAGE_WELCOME])
+    for value in (session, game.human, game.seed, len(game.ai_levels)):
+        write_varint(message, int(value))
+    message.extend(level or 0 for level in game.ai_levels)
+    return message
+
+
+def parse_welcome(data):
+    """ (session, human, seed, ai_levels) from a welcome message """
+    offset = 1
+    values = []
+    for _ in range(4):
+        value, offset = read_varint(data, offset)
+        values.append(value)
+    session, human, seed, ai_boards = values
+    return session, bool(human), seed, [level or None for level in data[offset:offset + ai_boards]]
+
+
+class Client:
+    def __init__(self, writer, session):
+        """
+        Class constructor, a connection watching a session, with what it has been sent so far
+        Parameters:
+            - self (Client): This class instance
+            - writer (asyncio.StreamWriter): Where its messages go
+            - session (Session): Session it joined
+        Returns:
+            None
+        """
+        self.writer = writer
+        self.session = session
+        self.reset()
+        # Bytes sent to this client since it joined
+        self.bytes_sent = 0
+
+    def reset(self):
+        """ Forgets what the client was sent, for when it joins or its session starts a new game """
+        # Enemy or missile id -> (x, y, change_x, change_y) the client has for it, quantized
+        self.known = {}
+        # (x, alive, out) of each ship, and (score, wave, game over) as last sent
+        self.ships = []
+        self.header = (None, None, None)
+
+    def send(self, message):
+        self.writer.write(LENGTH.pack(len(message)) + message)
+        self.bytes_sent += LENGTH.size + len(message)
+
+    def tick_message(self, game, entities, events, ships):
+        """
+        Builds the tick telling this client what changed in its session since its last tick
+        Parameters:
+            - self (Client): This class instance
+            - game (GameEngine): The session's game, just stepped
+            - entities (dict): Id -> (board << 2 | kind, x, y, change_x, change_y) of every enemy and missile
+            - events (list): (type, board, x, y) of every kill and death this step
+            - ships (list): (x, alive, out) of every board's ship
+        Returns:
+            bytearray: The message
+        """
+        flags = 0
+        body = bytearray()
+        header = (game.score, game.wave, game.game_over)
+        if header[0] != self.header[0]:
+            flags |= TICK_SCORE
+            write_signed(body, header[0])
+        if header[1] != self.header[1]:
+            flags |= TICK_WAVE
+            write_varint(body, header[1])
+        if header[2] != self.header[2]:
+            flags |= TICK_GAME_OVER
+            body.append(header[2])
+        self.header = header
+        if game.finished:
+            flags |= TICK_FINISHED
+
+        changed = [(index, ship) for index, ship in enumerate(ships)
+                   if index >= len(self.ships) or ship != self.ships[index]]
+        if changed:
+            flags |= TICK_SHIPS
+            write_varint(body, len(changed))
+            for index, (x, alive, out) in changed:
+                write_varint(body, index)
+                write_signed(body, x)
+                body.append(alive | out << 1)
+            self.ships = ships
+
+        known = self.known
+        removed = [entity_id for entity_id in known if entity_id not in entities]
+        if removed:
+            flags |= TICK_REMOVED
+            write_varint(body, len(removed))
+            for entity_id in removed:
+                write_varint(body, entity_id)
+                del known[entity_id]
+
+        # The client moves everything it has by its speed, only send what that gets wrong
+        records = bytearray()
+        count = 0
+        for entity_id, (code, x, y, change_x, change_y) in entities.items():
+            state = (x, y, change_x, change_y)
+            old = known.get(entity_id)
+            if old is None or (old[0] + old[2], old[1] + old[3], old[2], old[3]) != state:
+                count += 1
+                write_varint(records, entity_id)
+                write_varint(records, code)
+                for value in state:
+                    write_signed(records, value)
+            known[entity_id] = state
+        if count:
+            flags |= TICK_RECORDS
+            write_varint(body, count)
+            body.extend(records)
+
+        if events:
+            flags |= TICK_EVENTS
+            write_varint(body, len(events))
+            for event_type, board, x, y in events:
+                body.append(event_type)
+                write_varint(body, board)
+                write_signed(body, x)
+                write_signed(body, y)
+        return bytearray([MESSAGE_TICK, flags]) + body
+
+
+def game_seed(seed, session, game):
+    """
+    Seed of a session's game, a hash of the server's seed, the session and the game's number in it so
+    no two games on a server share one however many are played, and telemetry can tell them apart
+    Parameters:
+        - seed (int): The server's seed
+        - session (int): Session number
+        - game (int): Games the session started before this one
+    Returns:
+        int: The seed, below 2**63 to fit telemetry's game column
+    """
+    digest = hashlib.blake2b(struct.pack('<qQQ', seed, session, game), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') >> 1
+
+
+class Session:
+    def __init__(self, index, human, ai_levels, seed, telemetry_log=None):
+        """
+        Class constructor, a game slot on the server. Its game starts when the first client joins,
+        and a new one starts when a client joins after it has finished
+        Parameters:
+            - self (Session): This class instance
+            - index (int): Session number clients join with
+            - human (bool): Whether the first client to join plays the human's board
+            - ai_levels (list): Level of each AI board, None ramps it with the waves
+            - seed (int): The server's seed, each game's own is made from it by game_seed
+            - telemetry_log (telemetry.TelemetryLog): Where its games log their events, None to not log
+        Returns:
+            None
+        """
+        self.index = index
+        self.human = human
+        self.ai_levels = ai_levels
+        self.seed = seed
+        # Games started so far
+        self.games = 0
+        self.telemetry_log = telemetry_log
+        self.game = None
+        # Connections watching, the first one to join plays
+        self.clients = []
+        # Enemy or missile handle -> the id clients know it by
+        self.ids = {}
+        self.next_id = 0
+
+    @property
+    def running(self):
+        return self.game is not None and not self.game.finished
+
+    def start(self):
+        """ Starts a new game and welcomes every client to it """
+        self.game = engine.GameEngine(game_seed(self.seed, self.index, self.games), human=self.human,
+                                      ai_levels=self.ai_levels)
+        self.game.telemetry = self.telemetry_log
+        self.games += 1
+        self.ids = {}
+        message = welcome_message(self.index, self.game)
+        for client in self.clients:
+            client.reset()
+            client.send(message)
+
+    def join(self, client):
+        self.clients.append(client)
+        if self.running:
+            client.send(welcome_message(self.index, self.game))
+        else:
+            self.start()
+
+    def leave(self, client):
+        if client in self.clients:
+            self.clients.remove(client)
+
+    def input(self, client, action, pressed):
+        """ Applies a key press from a client, only the one playing controls the ship """
+        if self.running and self.human and self.clients and client is self.clients[0]:
+            if pressed:
+                self.game.press(action)
+            else:
+                self.game.release(action)
+
+    def entities(self):
+        """ Id -> (board << 2 | kind, x, y, change_x, change_y) of every enemy and missile in play, quantized """
+        game = self.game
+        store = game.store
+        handles = [entity for board in game.boards for group in (board.enemies, board.missiles) for entity in group]
+        slots = store.slots(handles)
+        values = np.rint(store.values[:, slots] / QUANTUM).astype(np.int64)
+        codes = (store.board[slots].astype(np.int64) << 2 | store.kind[slots]).tolist()
+        ids = {}
+        old_ids = self.ids
+        for handle in handles:
+            entity_id = old_ids.get(handle)
+            if entity_id is None:
+                entity_id = self.next_id
+                self.next_id += 1
+            ids[handle] = entity_id
+        self.ids = ids
+        return dict(zip(ids.values(), zip(codes, *(values[row].tolist() for row in (0, 1, 4, 5)))))
+
+    def tick(self):
+        """ Steps the game and sends each client its tick, returns whether a step ran """
+        if not self.running:
+            return False
+        game = self.game
+        game.step()
+        entities = self.entities()
+        events = []
+        for event in game.events:
+            board = event[2].board if event[0] == 'death' else event[1].board
+            events.append((EVENT_KILL if event[0] == 'kill' else EVENT_DEATH, board,
+                           quantize(event[1].center_x), quantize(event[1].center_y)))
+        ships = [(quantize(board.ship.center_x), board.ship.alive, board.out) for board in game.boards]
+        for client in self.clients:
+            client.send(client.tick_message(game, entities, events, ships))
+        return True
+
+
+class ArenaServer:
+    def __init__(self, sessions, human=True, ai_levels=(None,), seed=0, telemetry_log=None):
+        """
+        Class constructor, sets up the sessions, nothing runs until serve()
+        Parameters:
+            - self (ArenaServer): This class instance
+            - sessions (int): Number of sessions
+            - human (bool): Whether each session has a board for the client that plays it
+            - ai_levels (list): Level of each AI board in every session, None ramps it with the waves
+            - seed (int): Seed every game's own is made from, see game_seed
+            - telemetry_log (telemetry.TelemetryLog): Where every session's games log their events, None to not log
+        Returns:
+            None
+        """
+        self.sessions = [Session(index, human, list(ai_levels), seed, telemetry_log)
+                         for index in range(sessions)]
+        # Seconds each of the recent ticks took to step every session and send every tick
+        self.tick_times = []
+        self.dropped_steps = 0
+        self.last_stats = time.perf_counter()
+        self.bytes_at_last_stats = 0
+
+    async def handle_client(self, reader, writer):
+        """ Serves one connection: a join, then key presses until it disconnects or sends something malformed """
+        client = None
+        try:
+            while True:
+                length = LENGTH.unpack(await reader.readexactly(LENGTH.size))[0]
+                if not 0 < length <= MAX_CLIENT_MESSAGE:
+                    break
+                message = await reader.readexactly(length)
+                if message[0] == MESSAGE_JOIN and client is None:
+                    index, end = read_varint(message, 1)
+                    if end != length or index >= len(self.sessions):
+                        break
+                    client = Client(writer, self.sessions[index])
+                    client.session.join(client)
+                elif message[0] == MESSAGE_INPUT and client is not None and length == 2:
+                    action = message[1] >> 1
+                    if action not in CLIENT_ACTIONS:
+                        break
+                    client.session.input(client, action, bool(message[1] & 1))
+                else:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, IndexError):
+            # IndexError is a join whose session number runs past the end of the message
+            pass
+        finally:
+            if client is not None:
+                client.session.leave(client)
+            writer.close()
+
+    def tick(self):
+        """ One fixed step of every running session """
+        start = time.perf_counter()
+        for session in self.sessions:
+            session.tick()
+            for client in list(session.clients):
+                if client.writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                    # Not reading fast enough, let it go rather than buffer for it
+                    session.leave(client)
+                    client.writer.close()
+        self.tick_times.append(time.perf_counter() - start)
+
+    async def run(self):
+        """ Ticks every session at engine.STEP_RATE for as long as the server runs """
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            self.tick()
+            next_tick += engine.STEP_TIME
+            delay = next_tick - loop.time()
+            if delay < -MAX_LAG_STEPS * engine.STEP_TIME:
+                # Too far behind to catch up, drop the steps that are left
+                behind = int(-delay // engine.STEP_TIME)
+                self.dropped_steps += behind
+                next_tick += behind * engine.STEP_TIME
+                delay = next_tick - loop.time()
+            if time.perf_counter() - self.last_stats >= STATS_INTERVAL:
+                print(self.stats_line(), flush=True)
+            await asyncio.sleep(max(0.0, delay))
+
+    def stats_line(self):
+        """ Load since the last stats line: tick times, and bytes per second sent to each client """
+        now = time.perf_counter()
+        seconds = now - self.last_stats
+        times = np.array(self.tick_times or [0.0]) * 1000
+        clients = [client for session in self.sessions for client in session.clients]
+        total = sum(client.bytes_sent for client in clients)
+        rate = (total - self.bytes_at_last_stats) / seconds / max(len(clients), 1) / 1024
+        line = (f'{sum(session.running for session in self.sessions)}/{len(self.sessions)} sessions running, '
+                f'{len(clients)} clients, tick ms p50 {np.percentile(times, 50):.2f} max {times.max():.2f}, '
+                f'{times.sum() / 1000 / seconds * 100:.0f}% of a core, {rate:.2f} KiB/s per client, '
+                f'{self.dropped_steps} steps dropped')
+        self.tick_times = []
+        self.last_stats = now
+        self.bytes_at_last_stats = total
+        return line
+
+    async def serve(self, address):
+        """
+        Listens for clients and ticks the sessions until cancelled
+        Parameters:
+            - self (ArenaServer): This class instance
+            - address (tuple): From parse_address
+        Returns:
+            None
+        """
+        if address[0] == 'unix':
+            server = await asyncio.start_unix_server(self.handle_client, address[1])
+        else:
+            server = await asyncio.start_server(self.handle_client, address[1], address[2])
+        async with server:
+            await self.run()
+
+
+class ArenaClient:
+    def __init__(self, address, session):
+        """
+        Class constructor, connects to a server and joins a session. Ticks are read on a thread
+        and queued, so the game's loop never waits for the network
+        Parameters:
+            - self (ArenaClient): This class instance
+            - address (tuple): From parse_address
+            - session (int): Session to join
+        Returns:
+            None
+        """
+        if address[0] == 'unix':
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(address[1])
+        else:
+            self.socket = socket.create_connection(address[1:])
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.socket.makefile('rb')
+        # Bytes received so far
+        self.bytes_received = 0
+        message = bytearray([MESSAGE_JOIN])
+        write_varint(message, session)
+        self.send(message)
+        self.session, self.human, self.seed, self.ai_levels = parse_welcome(self.read())
+        # Messages received and not handled yet
+        self.messages = collections.deque()
+        self.closed = False
+        threading.Thread(target=self._read_messages, name='arena-client', daemon=True).start()
+
+    def send(self, message):
+        self.socket.sendall(LENGTH.pack(len(message)) + message)
+
+    def send_input(self, action, pressed):
+        try:
+            self.send(bytes([MESSAGE_INPUT, action << 1 | pressed]))
+        except OSError:
+            self.closed = True
+
+    def read(self):
+        """ Next message from the server, None once it has disconnected """
+        header = self.file.read(LENGTH.size)
+        if len(header) < LENGTH.size:
+            return None
+        message = self.file.read(LENGTH.unpack(header)[0])
+        self.bytes_received += LENGTH.size + len(message)
+        return message
+
+    def _read_messages(self):
+        try:
+            while (message := self.read()) is not None:
+                self.messages.append(message)
+        except OSError:
+            pass
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+
+
+class MirrorGame(engine.GameEngine):
+    def __init__(self, client):
+        """
+        Class constructor, a copy of an arena session's game that follows the server's ticks instead
+        of running the rules itself. It has the same boards, entities and events as the real game,
+        so it can be drawn the same way
+        Parameters:
+            - self (MirrorGame): This class instance
+            - client (ArenaClient): Connection to the session
+        Returns:
+            None
+        """
+        super().__init__(client.seed, human=client.human, ai_levels=client.ai_levels)
+        self.client = client
+        # Id -> Enemy or Missile
+        self.handles = {}
+        # Waiting for the first few ticks before drawing any
+        self.buffering = True
+
+    def press(self, action):
+        self.client.send_input(action, True)
+
+    def release(self, action):
+        self.client.send_input(action, False)
+
+    def step(self):
+        """
+        Applies the server's next tick, plus any extra ones that have piled up. With none waiting the
+        game holds still until one arrives
+        Parameters:
+            - self (MirrorGame): This class instance
+        Returns:
+            bool: False once the game has finished or the server is gone
+        """
+        self.events = []
+        if self.finished:
+            return False
+        messages = self.client.messages
+        if self.buffering:
+            self.buffering = len(messages) < BUFFER_TICKS and not self.client.closed
+        waiting = 0 if self.buffering else len(messages)
+        if waiting == 0:
+            if self.client.closed:
+                self.finished = True
+                return False
+            self.hold()
+            return True
+        for _ in range(max(1, waiting - BUFFER_TICKS) if waiting > MAX_BUFFER_TICKS else 1):
+            message = messages.popleft()
+            if message[0] == MESSAGE_WELCOME:
+                # Someone started a new game in this session, this one is over
+                self.finished = True
+                return False
+            self.apply_tick(message)
+        return not self.finished
+
+    def hold(self):
+        """ Keeps everything where it is for a step """
+        self.store.values[2:4] = self.store.values[0:2]
+        for board in self.boards:
+            board.ship.prev_x, board.ship.prev_y = board.ship.center_x, board.ship.center_y
+
+    def apply_tick(self, data):
+        """
+        Brings the game up to date with a tick message, in the order the server's step ran: what died
+        goes first, then everything moves, then what moving got wrong is set right
+        Parameters:
+            - self (MirrorGame): This class instance
+            - data (bytes): The tick
+        Returns:
+            None
+        """
+        flags = data[1]
+        offset = 2
+        if flags & TICK_SCORE:
+            self.score, offset = read_signed(data, offset)
+        if flags & TICK_WAVE:
+            self.wave, offset = read_varint(data, offset)
+        if flags & TICK_GAME_OVER:
+            self.game_over = data[offset]
+            offset += 1
+        if flags & TICK_FINISHED:
+            # The server's last step only finished the game, nothing moved
+            self.finished = True
+            return
+
+        boards = self.boards
+        for board in boards:
+            board.ship.prev_x = board.ship.center_x
+        if flags & TICK_SHIPS:
+            count, offset = read_varint(data, offset)
+            for _ in range(count):
+                index, offset = read_varint(data, offset)
+                x, offset = read_signed(data, offset)
+                state = data[offset]
+                offset += 1
+                ship = boards[index].ship
+                ship.center_x = x * QUANTUM
+                ship.alive = bool(state & 1)
+                boards[index].out = bool(state & 2)
+
+        if flags & TICK_REMOVED:
+            count, offset = read_varint(data, offset)
+            for _ in range(count):
+                entity_id, offset = read_varint(data, offset)
+                self.handles.pop(entity_id).kill()
+        # Nothing leaves the top on its own here, the server says when it has
+        self.store.move(math.inf)
+
+        if flags & TICK_RECORDS:
+            count, offset = read_varint(data, offset)
+            for _ in range(count):
+                entity_id, offset = read_varint(data, offset)
+                code, offset = read_varint(data, offset)
+                values = []
+                for _ in range(4):
+                    value, offset = read_signed(data, offset)
+                    values.append(value * QUANTUM)
+                x, y, change_x, change_y = values
+                handle = self.handles.get(entity_id)
+                if handle is not None:
+                    handle.center_x, handle.center_y = x, y
+                    handle.change_x, handle.change_y = change_x, change_y
+                    continue
+                board = boards[code >> 2]
+                if code & 3 == entities.KIND_ENEMY:
+                    handle = engine.Enemy(self.store, x, y, board.index)
+                    handle.change_x, handle.change_y = change_x, change_y
+                    board.enemies.append(handle)
+                    # prune() takes dead enemies out of the target index, so they have to be in it
+                    board.targets.add(handle, y - change_y * self.frame)
+                else:
+                    handle = engine.Missile(self.store, x, y, board.index)
+                    handle.change_x, handle.change_y = change_x, change_y
+                    board.missiles.append(handle)
+                self.handles[entity_id] = handle
+
+        if flags & TICK_EVENTS:
+            count, offset = read_varint(data, offset)
+            for _ in range(count):
+                event_type = data[offset]
+                board, offset = read_varint(data, offset + 1)
+                x, offset = read_signed(data, offset)
+                y, offset = read_signed(data, offset)
+                spot = Spot((x * QUANTUM, y * QUANTUM))
+                if event_type == EVENT_KILL:
+                    self.events.append(('kill', spot))
+                else:
+                    self.events.append(('death', spot, boards[board].ship))
+
+        if self.store.deaths:
+            for board in boards:
+                self.prune(board)
+            self.store.deaths = 0
+        self.frame += 1
+        self.time = self.frame * engine.STEP_TIME
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Host many HumanVsAi sessions for clients started with '
+                                                 'HumanVsAi.py --connect')
+    parser.add_argument('--listen', default=str(DEFAULT_PORT), metavar='ADDRESS',
+                        help='HOST:PORT or PORT to listen on over TCP, or unix:PATH for a Unix socket')
+    parser.add_argument('--sessions', type=int, default=16, help='number of sessions')
+    parser.add_argument('--ai-levels', type=int, nargs='+', default=[0], metavar='LEVEL',
+                        help='level of each AI board in every session, 0 ramps it with the waves')
+    parser.add_argument('--ai-only', action='store_true', help='no human board, clients only watch')
+    parser.add_argument('--seed', type=int, default=0, help='seed every game\'s own is made from')
+    parser.add_argument('--telemetry', metavar='DIR',
+                        help='log every session\'s shots, kills, missed shots and ships lost to this folder')
+    args = parser.parse_args()
+
+    telemetry_log = telemetry.TelemetryLog(args.telemetry) if args.telemetry else None
+    server = ArenaServer(args.sessions, not args.ai_only, [level or None for level in args.ai_levels], args.seed,
+                         telemetry_log)
+    print(f'Arena with {args.sessions} sessions listening on {args.listen}', flush=True)
+    try:
+        asyncio.run(server.serve(parse_address(args.listen)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if telemetry_log is not None:
+            telemetry_log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import pathlib
+import threading
+import time
+
+import arcade
+import PIL.Image
+
+# Every image the game draws, loaded once and handed out as shared arcade.Texture
+# objects. Sprites built from the same texture share one spot in arcade's texture
+# atlas, so nothing is decoded or uploaded twice. The tile map uses the same files, and
+# arcade loads a file into one texture however often it is asked for, so the scene's
+# background is the manager's texture too. The explosion effects are drawn
+# into a small texture once at startup rather than made while the game runs.
+
+ASSETS_PATH = str(pathlib.Path(__file__).resolve().parent) + '/assets'
+
+# Effect textures, side by side in one texture in this order, each EFFECT_SIZE pixels square
+EFFECT_KINDS = ('particle', 'smoke')
+EFFECT_SIZE = 64
+# Images ending with this are the originals the game's images were scaled down from
+SOURCE_ART_SUFFIX = '(original).png'
+
+
+class AssetManager:
+    def __init__(self, root=ASSETS_PATH):
+        """
+        Class constructor, creates an empty manager, textures are loaded when first asked for
+        Parameters:
+            - self (AssetManager): This class instance
+            - root (str): Folder holding the images
+        Returns:
+            None
+        """
+        self.root = pathlib.Path(root)
+        # Name (path relative to root) -> arcade.Texture
+        self.textures = {}
+        # Name -> seconds it took to load
+        self.load_times = {}
+        # Textures may be loaded from a background thread, one load at a time
+        self.lock = threading.Lock()
+        # Effect name -> arcade.Texture, and all of them in one GPU texture for the explosion shader
+        self.effects = {}
+        self.effect_texture = None
+        self.ctx = None
+
+    def names(self):
+        """ Names of every PNG under root, leaving out the full size source art the game never draws """
+        return sorted(str(path.relative_to(self.root)) for path in self.root.rglob('*.png')
+                      if not path.name.endswith(SOURCE_ART_SUFFIX))
+
+    def texture(self, name):
+        """
+        The shared texture of an image, loading it the first time
+        Parameters:
+            - self (AssetManager): This class instance
+            - name (str): Path of the image relative to root, such as 'fighter.png'
+        Returns:
+            arcade.Texture: The texture
+        """
+        texture = self.textures.get(name)
+        if texture is None:
+            with self.lock:
+                texture = self.textures.get(name)
+                if texture is None:
+                    start = time.perf_counter()
+                    texture = arcade.load_texture(str(self.root / name))
+                    self.load_times[name] = time.perf_counter() - start
+                    self.textures[name] = texture
+        return texture
+
+    def make_effects(self):
+        """
+        Draws the particle and smoke textures once. They are white so the explosion shader can tint them,
+        and the smoke is soft like arcade's soft circle textures. Sparkles are particles drawn white
+        Parameters:
+            - self (AssetManager): This class instance
+        Returns:
+            dict: Effect name -> arcade.Texture
+        """
+        if not self.effects:
+            # One pixel short of the cell on each side so neighbouring effects never blend together
+            diameter = EFFECT_SIZE - 2
+            self.effects = {
+                'particle': arcade.make_circle_texture(diameter, arcade.color.WHITE, 'effect-particle'),
+                'smoke': arcade.make_soft_circle_texture(diameter, arcade.color.WHITE, 255, 0, 'effect-smoke'),
+            }
+        return self.effects
+
+    def prepare(self, ctx):
+        """
+        Uploads everything loaded so far to the GPU: each texture into the window's texture atlas and
+        the effects into their own texture, call once the window exists
+        Parameters:
+            - self (AssetManager): This class instance
+            - ctx (arcade.ArcadeContext): The window's context
+        Returns:
+            None
+        """
+        self.ctx = ctx
+        with self.lock:
+            textures = list(self.textures.values())
+        for texture in textures:
+            ctx.default_atlas.add(texture)
+        self.get_effect_texture(ctx)
+
+    def get_effect_texture(self, ctx):
+        """
+        The effects side by side in one GPU texture, made the first time it is asked for
+        Parameters:
+            - self (AssetManager): This class instance
+            - ctx (arcade.ArcadeContext): The window's context
+        Returns:
+            arcade.gl.Texture: The texture, EFFECT_SIZE high and EFFECT_SIZE wide per effect
+        """
+        if self.effect_texture is None:
+            sheet = PIL.Image.new('RGBA', (EFFECT_SIZE * len(EFFECT_KINDS), EFFECT_SIZE), (255, 255, 255, 0))
+            for index, kind in enumerate(EFFECT_KINDS):
+                sheet.paste(self.make_effects()[kind].image, (index * EFFECT_SIZE + 1, 1))
+            self.effect_texture = ctx.texture(sheet.size, components=4, data=sheet.tobytes())
+        return self.effect_texture
+
+    def report(self):
+        """ Prints how long loading took and how much GPU memory the textures take up """
+        print(f'Assets: {len(self.textures)} textures loaded in {sum(self.load_times.values()) * 1000:.1f} ms')
+        for name, seconds in sorted(self.load_times.items(), key=lambda item: -item[1]):
+            width, height = self.textures[name].image.size
+            print(f'    {name:<28}{width:>5}x{height:<5}{seconds * 1000:8.1f} ms')
+        if self.ctx is not None:
+            atlas = self.ctx.default_atlas
+            print(f'    texture atlas {atlas.width}x{atlas.height}: {atlas.width * atlas.height * 4 / 2**20:.1f} MiB')
+        if self.effect_texture is not None:
+            width, height = self.effect_texture.size
+            print(f'    effect texture {width}x{height}: {width * height * 4 / 2**10:.1f} KiB')
+
+
+# Loads and holds every texture of the game
+manager = AssetManager()
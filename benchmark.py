@@ -0,0 +1,296 @@
+import argparse
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pyglet
+
+# Benchmarks run in an offscreen window unless --window is given, pyglet has to know
+# before arcade is imported
+pyglet.options['headless'] = '--window' not in sys.argv
+
+import arcade
+
+import engine
+import views
+
+# Performance benchmarks for HumanVsAiView. Each scenario drives the real view, update
+# and draw, through a fixed, seeded load in its own process, so one scenario's memory
+# never counts against another's. Every frame is timed, then a few more frames run
+# under tracemalloc to see how much the Python heap grows. Results can be saved as a
+# JSON baseline, and a later run compared to it fails if it got worse by more than a
+# set percentage.
+
+SCENARIOS = ('wave12', 'explosions', 'missiles', 'restart', 'soak')
+# Frames timed in each scenario, the soak test's come from --soak-minutes
+SCENARIO_FRAMES = {'wave12': 1200, 'explosions': 1200, 'missiles': 1200, 'restart': 600}
+# Frames run first so startup work such as compiling shaders isn't timed
+WARMUP_FRAMES = 60
+# Frames run under tracemalloc after the timed ones
+ALLOC_FRAMES = 300
+# Length of the soak test in game minutes
+SOAK_MINUTES = 30
+SEED = 2140
+
+# Explosions per burst and frames between bursts in the explosions scenario
+BURST_KILLS = 50
+BURST_INTERVAL = 60
+# Missiles kept flying in the missiles scenario
+LIVE_MISSILES = 500
+# Frames between restarts in the restart scenario
+RESTART_INTERVAL = 10
+
+# A metric regresses when it is this many percent over the baseline
+REGRESSION_THRESHOLD = 10
+# and by more than this much, smaller changes are run-to-run noise
+NOISE_FLOORS = {'p50_ms': 0.05, 'p95_ms': 0.1, 'p99_ms': 0.2, 'heap_growth_kib': 64, 'peak_rss_mib': 8}
+
+
+class BenchmarkView(views.HumanVsAiView):
+    def __init__(self, ai_levels, wave=1):
+        """
+        Class constructor, a game with only AI boards that starts at a given wave and starts over
+        whenever it ends, so a scenario can run for as long as it needs
+        Parameters:
+            - self (BenchmarkView): This class instance
+            - ai_levels (list): Level of each AI board, None ramps it with the waves
+            - wave (int): Wave the game starts on
+        Returns:
+            None
+        """
+        self.benchmark_ai_levels = ai_levels
+        self.start_wave = wave
+        super().__init__(SEED)
+
+    def new_engine(self):
+        game = engine.GameEngine(self.seed, human=False, ai_levels=self.benchmark_ai_levels)
+        # The first step spawns the next wave, with the difficulty it would have by then
+        game.wave = self.start_wave - 1
+        game.enemies_per_y = 1 + (self.start_wave - 1) // 3
+        return game
+
+    def end_game(self):
+        # Start over instead of showing the GameOver screen
+        self.setup()
+
+
+def wave12_scenario():
+    """ The last wave, the densest one, with the level 4 AI playing it """
+    return BenchmarkView([4], wave=12), None
+
+
+def explosions_scenario():
+    """ BURST_KILLS enemies exploding on the same frame, every BURST_INTERVAL frames """
+    rng = random.Random(SEED)
+
+    def burst(view, frame):
+        if frame % BURST_INTERVAL == 0:
+            for _ in range(BURST_KILLS):
+                view.explosions.emit((rng.uniform(0, view.world_width), rng.uniform(100, 700)))
+    return BenchmarkView([4]), burst
+
+
+def missiles_scenario():
+    """ The AI board kept topped up to LIVE_MISSILES missiles in flight """
+    rng = random.Random(SEED)
+
+    def top_up(view, frame):
+        board = view.engine.boards[engine.AI_BOARD]
+        while len(board.missiles) < LIVE_MISSILES:
+            x = rng.randrange(10) * 50 + 25 + board.offset
+            board.missiles.append(engine.Missile(view.engine.store, x, rng.uniform(75, engine.SCREEN_HEIGHT), board.index))
+    return BenchmarkView([4]), top_up
+
+
+def restart_scenario():
+    """ A new game through setup() every RESTART_INTERVAL frames """
+    def restart(view, frame):
+        if frame % RESTART_INTERVAL == 0:
+            view.setup()
+    return BenchmarkView([4]), restart
+
+
+def soak_scenario():
+    """ Whole games one after another, the AI ramping up with the waves like in a normal game """
+    return BenchmarkView([None]), None
+
+
+SCENARIO_SETUP = {
+    'wave12': wave12_scenario,
+    'explosions': explosions_scenario,
+    'missiles': missiles_scenario,
+    'restart': restart_scenario,
+    'soak': soak_scenario,
+}
+
+
+def run_frames(window, view, before_frame, first, count):
+    """
+    Runs frames of a scenario, each one a fixed step of on_update and an on_draw
+    Parameters:
+        - window (arcade.Window): The window
+        - view (BenchmarkView): The game
+        - before_frame (function): Called with (view, frame number) before each frame, None for nothing
+        - first (int): Number of the first frame
+        - count (int): Frames to run
+    Returns:
+        numpy.ndarray: Seconds each frame took, including before_frame and waiting for the GPU
+    """
+    times = np.empty(count)
+    for index in range(count):
+        start = time.perf_counter()
+        if before_frame is not None:
+            before_frame(view, first + index)
+        view.on_update(engine.STEP_TIME)
+        view.on_draw()
+        window.ctx.finish()
+        times[index] = time.perf_counter() - start
+    return times
+
+
+def peak_rss_mib():
+    """ Most memory this process has had resident, None where the OS doesn't say """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def measure(name, frames):
+    """
+    Runs one scenario in this process
+    Parameters:
+        - name (str): Scenario to run
+        - frames (int): Frames to time
+    Returns:
+        dict: Frame times in milliseconds, Python heap growth and peak, and peak RSS
+    """
+    # Keep explosions at full quality so slow frames don't make later ones cheaper
+    views.HumanVsAiView.quality_level = len(views.ex.QUALITY_LEVELS) - 1
+    window = arcade.Window(engine.SCREEN_WIDTH, views.GAME_WINDOW_HEIGHT, f'benchmark {name}')
+    view, before_frame = SCENARIO_SETUP[name]()
+    window.set_size(*view.window_size())
+    window.show_view(view)
+
+    run_frames(window, view, before_frame, 0, WARMUP_FRAMES)
+    times = run_frames(window, view, before_frame, WARMUP_FRAMES, frames) * 1000
+
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    run_frames(window, view, before_frame, WARMUP_FRAMES + frames, ALLOC_FRAMES)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(times, (50, 95, 99))
+    return {
+        'frames': frames,
+        'mean_ms': float(times.mean()),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(times.max()),
+        'heap_growth_kib': (current - start) / 1024,
+        'heap_peak_kib': (peak - start) / 1024,
+        'peak_rss_mib': peak_rss_mib(),
+    }
+
+
+def run_child(name, args):
+    """ Runs a scenario in a new process and returns its results """
+    command = [sys.executable, __file__, '--child', name, '--soak-minutes', str(args.soak_minutes)]
+    if args.window:
+        command.append('--window')
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    # The results are the last line, anything before it is the game's own output
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results to a baseline
+    Parameters:
+        - results (dict): Scenario name to metrics, from this run
+        - baseline (dict): Scenario name to metrics, from the baseline
+        - threshold (float): Percentage a metric can get worse by before it counts as a regression
+    Returns:
+        list: Description of each regression, empty if there are none
+    """
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric, floor in NOISE_FLOORS.items():
+            new, old = metrics.get(metric), baseline[name].get(metric)
+            if new is None or old is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            regressed = new - old > floor and new > old * (1 + threshold / 100)
+            print(f'    {name:<12}{metric:<18}{old:10.2f} -> {new:10.2f} {change:+7.1f}%' +
+                  ('  REGRESSION' if regressed else ''))
+            if regressed:
+                regressions.append(f'{name} {metric} {old:.2f} -> {new:.2f} ({change:+.1f}%)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time HumanVsAiView through fixed load scenarios')
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help=f'scenarios to run, all of them if none are given: {", ".join(SCENARIOS)}')
+    parser.add_argument('--save', metavar='FILE', help='write the results to this JSON baseline')
+    parser.add_argument('--compare', metavar='FILE', help='fail if any result is worse than this JSON baseline')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, metavar='PERCENT',
+                        help='how much worse than the baseline a result may be')
+    parser.add_argument('--soak-minutes', type=float, default=SOAK_MINUTES, help='game minutes the soak test runs for')
+    parser.add_argument('--window', action='store_true', help='draw in a visible window instead of offscreen')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f'unknown scenario {unknown[0]}, choose from {", ".join(SCENARIOS)}')
+
+    if args.child:
+        frames = SCENARIO_FRAMES.get(args.child, int(args.soak_minutes * 60 * engine.STEP_RATE))
+        print(json.dumps(measure(args.child, frames)))
+        return
+
+    results = {}
+    print(f'{"scenario":<12}{"frames":>8}{"mean":>8}{"p50":>8}{"p95":>8}{"p99":>8}{"max":>8}'
+          f'{"heap+KiB":>10}{"RSS MiB":>9}')
+    for name in args.scenarios or SCENARIOS:
+        start = time.perf_counter()
+        metrics = results[name] = run_child(name, args)
+        rss = metrics['peak_rss_mib']
+        print(f'{name:<12}{metrics["frames"]:8}' +
+              ''.join(f'{metrics[key]:8.2f}' for key in ('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')) +
+              f'{metrics["heap_growth_kib"]:10.1f}{"" if rss is None else format(rss, "9.1f")}'
+              f'    ({time.perf_counter() - start:.0f}s)')
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({'python': platform.python_version(), 'platform': platform.platform(),
+                       'scenarios': results}, file, indent=2)
+        print(f'Saved baseline to {args.save}')
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)['scenarios']
+        print(f'Compared to {args.compare}, failing past +{args.threshold:g}%:')
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s)')
+            sys.exit(1)
+        print('No regressions')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import importlib.util
+import threading
+import time
+
+# Startup helpers for HumanVsAi. This module only uses the standard library so it
+# can run before arcade is imported: it checks dependencies are installed, times
+# each stage of startup and loads textures in the background while the window opens.
+
+# Libraries the game needs: module name -> pip package name
+REQUIRED_MODULES = {
+    'arcade': 'arcade',
+    'numpy': 'numpy',
+}
+
+
+def check_dependencies(modules=REQUIRED_MODULES):
+    """
+    Makes sure every required library is installed, without importing or installing anything
+    Parameters:
+        - modules (dict): Module name to the pip package that provides it
+    Returns:
+        None
+    Raises:
+        ImportError: If any module is missing, with the command that installs them
+    """
+    missing = [package for module, package in modules.items() if importlib.util.find_spec(module) is None]
+    if missing:
+        raise ImportError(f"Missing libraries: {', '.join(missing)}. "
+                          f"Install them with: python -m pip install {' '.join(missing)}")
+
+
+class StartupTimer:
+    """ Records how long each stage of startup takes """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        # (stage name, seconds) in the order they finished
+        self.stages = []
+        self.reported = False
+
+    def mark(self, stage):
+        """ Ends the current stage, which started when the previous one ended """
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def add(self, stage, seconds):
+        """ Records a stage that ran alongside the others, such as background loading """
+        self.stages.append((stage, seconds))
+
+    def report(self):
+        """ Prints the breakdown once, the first time it is called """
+        if self.reported:
+            return
+        self.reported = True
+        print('Startup timing:')
+        for stage, seconds in self.stages:
+            print(f'    {stage:<16}{seconds * 1000:8.1f} ms')
+        print(f"    {'total':<16}{(self.last - self.start) * 1000:8.1f} ms")
+
+
+class AssetPreloader:
+    def __init__(self, load, paths):
+        """
+        Class constructor, starts loading assets on a background thread
+        Parameters:
+            - self (AssetPreloader): This class instance
+            - load (function): Loads one asset from a path, such as arcade.load_texture
+            - paths (list): Paths to load, in order of need
+        Returns:
+            None
+        """
+        self.load = load
+        self.paths = list(paths)
+        self.error = None
+        self.seconds = 0.0
+        self.thread = threading.Thread(target=self._run, name='asset-preload', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            for path in self.paths:
+                self.load(path)
+        except Exception as e:
+            # Reported by wait, the asset will be loaded again when it is used
+            self.error = e
+        self.seconds = time.perf_counter() - start
+
+    def wait(self, timeout=None):
+        """
+        Blocks until every asset is loaded
+        Parameters:
+            - self (AssetPreloader): This class instance
+            - timeout (float): Most seconds to wait, forever if None
+        Returns:
+            bool: True if loading finished without errors
+        """
+        self.thread.join(timeout)
+        if self.error is not None:
+            print(f'Error preloading assets: {self.error}')
+        return not self.thread.is_alive() and self.error is None
+
+
+# Timer started when the game is first imported
+startup = StartupTimer()
@@ -0,0 +1,80 @@
+import numpy as np
+
+# Collision checks on whole arrays of objects at once. cell_pairs is the broadphase:
+# objects are bucketed into a uniform grid and only pairs sharing a cell are kept,
+# instead of every pair. The default 50 pixel cells line up with the 50 pixel lanes
+# enemies spawn in. boxes_overlap is the exact test, for whichever pairs are left.
+
+CELL_SIZE = 50
+
+
+def box_bounds(x, y, hit_box):
+    """ (left, right, bottom, top) arrays of hit boxes centered on arrays of x and y """
+    left, right, bottom, top = hit_box
+    return x + left, x + right, y + bottom, y + top
+
+
+def boxes_overlap(x, y, hit_box, other_x, other_y, other_hit_box):
+    """
+    Axis-aligned overlap test between hit boxes, the one collision test of the game
+    Parameters:
+        - x, y (numpy.ndarray): Centers of the first objects
+        - hit_box (tuple): (left, right, bottom, top) offsets of their hit boxes from the center
+        - other_x, other_y (numpy.ndarray): Centers of the objects tested against, broadcast with x and y
+        - other_hit_box (tuple): Offsets of their hit boxes
+    Returns:
+        numpy.ndarray: Whether each pair overlaps
+    """
+    left, right, bottom, top = hit_box
+    o_left, o_right, o_bottom, o_top = other_hit_box
+    return ((x + left < other_x + o_right) & (other_x + o_left < x + right) &
+            (y + bottom < other_y + o_top) & (other_y + o_bottom < y + top))
+
+
+def _cell_keys(bounds, cell_size):
+    """ Every (cell, object index) pair for arrays of bounds, each cell packed into one integer """
+    left, right, bottom, top = bounds
+    col_start = np.floor(left / cell_size).astype(np.int64)
+    col_end = np.floor(right / cell_size).astype(np.int64)
+    row_start = np.floor(bottom / cell_size).astype(np.int64)
+    row_end = np.floor(top / cell_size).astype(np.int64)
+    owners = np.arange(len(left))
+    keys = []
+    indexes = []
+    # Objects are usually smaller than a cell, so this loops at most twice each way
+    for col in range(int((col_end - col_start).max(initial=0)) + 1):
+        for row in range(int((row_end - row_start).max(initial=0)) + 1):
+            inside = (col_start + col <= col_end) & (row_start + row <= row_end)
+            keys.append(((col_start + col) << 32 | (row_start + row) & 0xFFFFFFFF)[inside])
+            indexes.append(owners[inside])
+    return np.concatenate(keys), np.concatenate(indexes)
+
+
+def cell_pairs(first, second, cell_size=CELL_SIZE):
+    """
+    Finds every pair between two groups of objects that share a grid cell, the pairs that can
+    collide, for many objects at once
+    Parameters:
+        - first (tuple): (left, right, bottom, top) arrays of the first group, see box_bounds
+        - second (tuple): (left, right, bottom, top) arrays of the second group
+        - cell_size (float): Width and height of a grid cell in pixels
+    Returns:
+        tuple: Arrays of first group indexes and second group indexes, each pair once, ordered
+        by first group index and then second group index
+    """
+    first_keys, first_indexes = _cell_keys(first, cell_size)
+    second_keys, second_indexes = _cell_keys(second, cell_size)
+    order = np.argsort(second_keys, kind='stable')
+    second_keys = second_keys[order]
+    second_indexes = second_indexes[order]
+    # Each first group cell matches a run of the sorted second group cells
+    start = np.searchsorted(second_keys, first_keys, 'left')
+    counts = np.searchsorted(second_keys, first_keys, 'right') - start
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, np.intp), np.zeros(0, np.intp)
+    runs = np.repeat(start - (np.cumsum(counts) - counts), counts) + np.arange(total)
+    # Objects sharing more than one cell are found more than once
+    width = len(second[0])
+    pairs = np.unique(np.repeat(first_indexes, counts) * width + second_indexes[runs])
+    return pairs // width, pairs % width
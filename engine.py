@@ -0,0 +1,932 @@
+import collections
+import itertools
+import math
+import operator
+import random
+
+import numpy as np
+
+from broadphase import box_bounds, boxes_overlap, cell_pairs
+import entities
+import lookahead
+from targeting import BoardTargetIndex
+
+_slot_of = operator.attrgetter('slot')
+
+# Headless game rules for HumanVsAi. Nothing in here touches arcade, a window or the
+# wall clock: time advances by a fixed step and every random choice comes from a
+# seeded generator, so a game replays identically for the same seed and inputs. The
+# one exception is opt-in: with realtime_planning the level 5 AI plans against the
+# clock, which the game can't replay.
+
+# Constants
+SCREEN_WIDTH = 500
+SCREEN_HEIGHT = 750
+
+# Simulation runs at a fixed 60 steps per simulated second
+STEP_RATE = 60
+STEP_TIME = 1 / STEP_RATE
+
+# Boards are laid out left to right, each 600 pixels to the right of the one before
+AI_BOARD_OFFSET = 600
+
+# Boards, the human player's is always first and the AI boards follow it
+PLAYER_BOARD = 0
+AI_BOARD = 1
+
+# Hit boxes as (left, right, bottom, top) offsets from the center, taken from the
+# bounding box of the 'Simple' hit box arcade computes for each sprite image
+PLAYER_HIT_BOX = (-25, 25, -25, 25)
+ENEMY_HIT_BOX = (-17, 18, -15, 21)
+MISSILE_HIT_BOX = (-6.5, 6.5, -12.5, 12.5)
+
+# Speeds in pixels per step
+PLAYER_SPEED = 5
+ENEMY_SPEED = -1.5
+MISSILE_SPEED = 5
+
+# Seconds between shots
+PLAYER_FIRE_DELAY = 0.5
+# How long the game keeps running after someone blows up
+GAME_OVER_DELAY = 2
+
+# Enemies are only created once they are this close above the top of the board. Missiles
+# can hit an enemy up to about 32 pixels above the top, so this leaves room to spare
+SPAWN_MARGIN = 50
+# Enemies at or above this height are dormant: no missile can reach them yet, since a missile
+# is gone once it passes the top of the board, so they skip collision checks until they fall
+# below it. Top of the board, plus one missile step, plus both hit boxes
+DORMANT_Y = SCREEN_HEIGHT + MISSILE_SPEED + MISSILE_HIT_BOX[3] - ENEMY_HIT_BOX[2]
+
+# Boards with at most this many enemy and missile pairs test every pair for collisions at
+# once, more than this and only pairs sharing a broadphase grid cell are tested
+BROADCAST_PAIRS = 4096
+
+# Counters of a game kept in keyframes as they are, see GameEngine.to_arrays
+SAVED_COUNTERS = ('frame', 'score', 'wave', 'enemies_per_y', 'last_shot', 'game_over', 'time_since_game_over',
+                  'finished', 'culled')
+
+# Player inputs understood by the engine
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_FIRE = 3
+
+
+class Entity:
+    """ Anything that moves on a board and can collide """
+    __slots__ = ()
+    # (left, right, bottom, top) offsets from the center
+    hit_box = None
+
+    @property
+    def position(self):
+        return self.center_x, self.center_y
+
+    def kill(self):
+        self.alive = False
+
+    def interpolated(self, alpha):
+        """ Position between the previous step (alpha 0) and the current one (alpha 1), for drawing """
+        return (self.prev_x + (self.center_x - self.prev_x) * alpha,
+                self.prev_y + (self.center_y - self.prev_y) * alpha)
+
+    def teleport(self, center_x):
+        """ Jumps to a new x without being drawn sliding there """
+        self.center_x = center_x
+        self.prev_x = center_x
+
+    def update(self):
+        self.prev_x = self.center_x
+        self.prev_y = self.center_y
+        self.center_x += self.change_x
+        self.center_y += self.change_y
+
+
+class Ship(Entity):
+    hit_box = PLAYER_HIT_BOX
+
+    def __init__(self, center_x, board):
+        self.center_x = center_x
+        self.center_y = 25
+        # Position at the start of the current step, drawing blends from here to the center
+        self.prev_x = center_x
+        self.prev_y = 25
+        self.change_x = 0
+        self.change_y = 0
+        # Which board the ship belongs to
+        self.board = board
+        # Cleared by kill() when an enemy reaches it
+        self.alive = True
+
+
+def _column(name):
+    """ Property reading and writing one of the EntityStore's columns at the entity's slot """
+    items = name + '_items'
+
+    def get(self):
+        return getattr(self.store, items)[self.slot]
+
+    def set(self, value):
+        getattr(self.store, items)[self.slot] = value
+    return property(get, set)
+
+
+class StoredEntity(Entity):
+    """
+    An enemy or missile, a handle to its slot in an EntityStore. There can be thousands of these,
+    so they only hold the store and the slot, and EntityStore.move moves all of them at once
+    """
+    __slots__ = ('store', 'slot', '__weakref__')
+    # One of the entities.KIND_ values
+    kind = None
+
+    center_x = _column('x')
+    center_y = _column('y')
+    prev_x = _column('prev_x')
+    prev_y = _column('prev_y')
+    change_x = _column('change_x')
+    change_y = _column('change_y')
+    # Cleared by kill(), dead entities are dropped at the end of the step
+    alive = _column('alive')
+    board = _column('board')
+    # Step an enemy came into play on, see GameEngine.add_enemy
+    born = _column('born')
+
+    def __init__(self, store, center_x, center_y, board, change_y):
+        self.store = store
+        self.slot = store.add(self.kind, center_x, center_y, change_y, board)
+
+    @classmethod
+    def at(cls, store, slot):
+        """ Handle of an entity already in a store, for games rebuilt from a keyframe """
+        entity = cls.__new__(cls)
+        entity.store = store
+        entity.slot = slot
+        return entity
+
+    def __del__(self):
+        # Nothing can look at this entity any more, so its slot can be reused
+        self.store.release(self.slot)
+
+    def kill(self):
+        self.alive = False
+        self.store.deaths += 1
+
+
+class Enemy(StoredEntity):
+    __slots__ = ()
+    kind = entities.KIND_ENEMY
+    hit_box = ENEMY_HIT_BOX
+
+    def __init__(self, store, spawn_x, spawn_y, board):
+        super().__init__(store, spawn_x, spawn_y, board, ENEMY_SPEED)
+
+
+class Missile(StoredEntity):
+    __slots__ = ()
+    kind = entities.KIND_MISSILE
+    hit_box = MISSILE_HIT_BOX
+
+    def __init__(self, store, spawn_x, spawn_y, board):
+        super().__init__(store, spawn_x, spawn_y, board, MISSILE_SPEED)
+
+
+class Board:
+    def __init__(self, index, store, ai_level=None, active=True):
+        """
+        Class constructor, creates an empty board. Each board keeps its own enemies and missiles,
+        so collisions and AI on one board never look at another
+        Parameters:
+            - self (Board): This class instance
+            - index (int): Position of the board from the left, PLAYER_BOARD is the human's
+            - store (EntityStore): Where the game keeps its entities
+            - ai_level (int): Level of the AI playing this board, None to ramp it up with the waves
+            - active (bool): Whether enemies spawn on this board, False for the human's board when only AI plays
+        Returns:
+            None
+        """
+        self.index = index
+        # X of the board's left edge, everything on the board is offset by it
+        self.offset = index * AI_BOARD_OFFSET
+        self.ship = Ship(250 + self.offset, index)
+        self.ai_level = ai_level
+        self.active = active
+        # Set when this board's ship blew up while other boards keep playing
+        self.out = False
+        self.enemies = []
+        self.missiles = []
+        # Enemies above DORMANT_Y, in spawn order. They only fall until they join enemies
+        self.dormant = []
+        # Live enemies in height order, and which ones AI #3/4 has shot at
+        self.targets = BoardTargetIndex()
+        # Time at which the AI last shot
+        self.last_shot = 0.0
+        # Current target of the level 3 AI
+        self.lowest_y = None
+        # Is the AI moving to its target?
+        self.finding_target = False
+        # Counter and direction for level 2 AI
+        self.counter = 0
+        self.counter_adder = 1
+        # Plan the level 5 AI is following and the shot of it it is on, the step it can fire
+        # again and the step it next asks its planner for a new plan
+        self.plan = None
+        self.plan_step = 0
+        self.next_fire_frame = 0
+        self.next_plan_frame = 0
+
+
+def wave_ai_level(wave):
+    """ Level of the AI for a wave, every 3rd wave a new algorithm takes over """
+    if wave < 3:
+        return 1
+    elif wave < 6:
+        return 2
+    elif wave < 9:
+        return 3
+    elif wave <= 12:
+        return 4
+    return None
+
+
+class GameEngine:
+    def __init__(self, seed=None, ai_level=None, human=True, ai_levels=None, wave_enemies=None):
+        """
+        Class constructor, initializes the state of a new game
+        Parameters:
+            - self (GameEngine): This class instance
+            - seed (int): Seed for the game's random number generator, random if None
+            - ai_level (int): Play every wave with this AI level instead of ramping it up with the waves
+            - human (bool): Simulate the human player's board, if False only the AI plays
+            - ai_levels (list): Level of each AI board, left to right, None in the list ramps that board
+              with the waves. Defaults to one board playing ai_level, an empty list is a solo game
+            - wave_enemies (int): Enemies on each board in every wave instead of the usual waves, all falling
+              at once from the top half of the board, for stress tests. None for the usual waves
+        Returns:
+            None
+        """
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+        self.human = human
+        if ai_levels is None:
+            ai_levels = [ai_level]
+        self.ai_levels = list(ai_levels)
+        self.wave_enemies = wave_enemies
+        # Every random choice in the game comes from this generator
+        self.rng = random.Random(seed)
+        # Number of steps simulated so far, and the simulated time in seconds
+        self.frame = 0
+        self.time = 0.0
+
+        # The human's board is always there so board numbers stay the same, it just never
+        # gets enemies when only AI plays
+        # Positions, speeds and state of every ship, enemy and missile
+        self.store = entities.EntityStore()
+        self.boards = [Board(PLAYER_BOARD, self.store, active=human)]
+        for level in self.ai_levels:
+            self.boards.append(Board(len(self.boards), self.store, level))
+        self.player = self.boards[PLAYER_BOARD].ship
+        # The first AI's ship, None in a solo game with no AI boards
+        self.ai_player = self.boards[AI_BOARD].ship if len(self.boards) > AI_BOARD else None
+        # Events produced by the most recent step, see step()
+        self.events = []
+
+        self.score = 0
+        # Wave number, larger numbers are more difficult
+        self.wave = 0
+        # Tied to wave difficulty
+        self.enemies_per_y = 1
+        # Enemies of the current wave not created yet, as (frame due, wave start frame, x, y, board)
+        # in the order they spawn, see spawn_wave
+        self.pending = collections.deque()
+        # Time at which a missile was last shot by the player
+        self.last_shot = self.time
+        # Is the game over? (0=No, 1=Player lost, 2=AI lost)
+        self.game_over = 0
+        # When someone blew up, allows for explosion to finish before quitting
+        self.time_since_game_over = 0
+        # Set once the game over delay has passed
+        self.finished = False
+
+        # Dormant enemies on every board after the last step
+        self.culled = 0
+
+        # FrameProfiler timing each phase of a step, None when not profiling
+        self.profiler = None
+        # ReplayRecorder told about every input and step, None when not recording
+        self.recorder = None
+        # TelemetryLog told about every shot, kill, missed shot and ship lost, None when not logging
+        self.telemetry = None
+        # LookaheadPlanner of each level 5 AI board, by board index, and whether they plan against the
+        # clock. Realtime planning plans more within a frame but the game can no longer be replayed
+        self.planners = {}
+        self.realtime_planning = False
+        # (plan handed over, [(due step, plan)] not handed over yet) of each level 5 board's planner,
+        # only filled in games rebuilt from a keyframe so their planners carry on from where the original's were
+        self.planned = {}
+
+        # Per-board totals of missiles fired, enemies killed and missiles that left the board
+        self.shots = [0] * len(self.boards)
+        self.kills = [0] * len(self.boards)
+        self.missed = [0] * len(self.boards)
+
+    @property
+    def enemies(self):
+        """ Live enemies of every board, dormant ones included, left board first """
+        return [enemy for board in self.boards for enemy in board.enemies + board.dormant]
+
+    @property
+    def missiles(self):
+        """ Missiles in flight on every board, left board first """
+        return [missile for board in self.boards for missile in board.missiles]
+
+    def enemies_left(self):
+        """ True while any board still has enemies from the current wave, including ones not created yet """
+        return bool(self.pending) or any(board.enemies or board.dormant for board in self.boards)
+
+    def press(self, action):
+        """
+        Applies a player input, LEFT and RIGHT start moving and FIRE shoots if the cooldown allows it
+        Parameters:
+            - self (GameEngine): This class instance
+            - action (int): One of INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE
+        Returns:
+            None
+        """
+        if self.recorder:
+            self.recorder.input(self.frame, action, True)
+        if action == INPUT_LEFT:
+            self.player.change_x = -PLAYER_SPEED
+        elif action == INPUT_RIGHT:
+            self.player.change_x = PLAYER_SPEED
+        elif action == INPUT_FIRE:
+            if self.last_shot <= self.time - PLAYER_FIRE_DELAY:
+                self.fire(self.player)
+                self.last_shot = self.time
+
+    def release(self, action):
+        """
+        Stops the player when a movement input is released
+        Parameters:
+            - self (GameEngine): This class instance
+            - action (int): One of INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE
+        Returns:
+            None
+        """
+        if self.recorder:
+            self.recorder.input(self.frame, action, False)
+        if action == INPUT_LEFT or action == INPUT_RIGHT:
+            self.player.change_x = 0
+
+    def to_arrays(self):
+        """
+        The whole state of the game as named arrays, for keyframes: its settings, the random generator,
+        every counter, the store's columns and each board with its entities given as their slots. Only
+        the game itself is kept, not whatever is watching or planning for it, apart from the plans its
+        planners have made
+        Parameters:
+            - self (GameEngine): This class instance
+        Returns:
+            dict: Name -> numpy.ndarray, see from_arrays
+        """
+        arrays = {
+            'seed': np.array(self.seed, np.uint64),
+            'human': np.array(self.human),
+            'ai_levels': np.array([level or 0 for level in self.ai_levels], np.int64),
+            'wave_enemies': np.array([] if self.wave_enemies is None else [self.wave_enemies], np.int64),
+            'shots': np.array(self.shots, np.int64),
+            'kills': np.array(self.kills, np.int64),
+            'missed': np.array(self.missed, np.int64),
+        }
+        version, internal, gauss_next = self.rng.getstate()
+        arrays['rng_version'] = np.array(version)
+        arrays['rng_internal'] = np.array(internal, np.int64)
+        arrays['rng_gauss_next'] = np.array([] if gauss_next is None else [gauss_next], np.float64)
+        for name in SAVED_COUNTERS:
+            arrays[name] = np.array(getattr(self, name))
+        # Spawns as (frame due, wave start frame, board) and (x, y)
+        arrays['pending_frames'] = np.array([(due, start, board) for due, start, _, _, board in self.pending],
+                                            np.int64).reshape(-1, 3)
+        arrays['pending_positions'] = np.array([(x, y) for _, _, x, y, _ in self.pending], np.float64).reshape(-1, 2)
+        # Events as (0 for a kill or 1 for a death, enemy slot, board of the ship that died or -1)
+        arrays['events'] = np.array([(event[0] == 'death', event[1].slot, event[2].board if len(event) > 2 else -1)
+                                     for event in self.events], np.int64).reshape(-1, 3)
+        for name, array in self.store.to_arrays().items():
+            arrays['store.' + name] = array
+
+        # Every plan once, boards and planners refer to them by their place in here, -1 for none,
+        # so a plan both a board and its planner hold is still one plan after a restore
+        plans = []
+        numbers = {}
+
+        def plan_number(plan):
+            if plan is None:
+                return -1
+            if id(plan) not in numbers:
+                numbers[id(plan)] = len(plans)
+                plans.append(plan)
+            return numbers[id(plan)]
+
+        for board in self.boards:
+            prefix = f'board{board.index}.'
+            ship = board.ship
+            arrays[prefix + 'ship'] = np.array([ship.center_x, ship.center_y, ship.prev_x, ship.prev_y,
+                                                ship.change_x, ship.change_y], np.float64)
+            arrays[prefix + 'ship_alive'] = np.array(ship.alive)
+            arrays[prefix + 'out'] = np.array(board.out)
+            arrays[prefix + 'enemies'] = self.store.slots(board.enemies).astype(np.int64)
+            arrays[prefix + 'missiles'] = self.store.slots(board.missiles).astype(np.int64)
+            arrays[prefix + 'dormant'] = self.store.slots(board.dormant).astype(np.int64)
+            for name, array in board.targets.to_arrays(_slot_of).items():
+                arrays[prefix + 'targets.' + name] = array
+            arrays[prefix + 'last_shot'] = np.array(board.last_shot, np.float64)
+            arrays[prefix + 'lowest_y'] = np.array(-1 if board.lowest_y is None else board.lowest_y.slot)
+            arrays[prefix + 'finding_target'] = np.array(board.finding_target)
+            arrays[prefix + 'counter'] = np.array([board.counter, board.counter_adder])
+            arrays[prefix + 'plan'] = np.array(plan_number(board.plan))
+            arrays[prefix + 'plan_frames'] = np.array([board.plan_step, board.next_fire_frame, board.next_plan_frame])
+            planner = self.planners.get(board.index)
+            if planner is not None:
+                # Waits for the searches still running, their plans are handed over after the keyframe
+                planned = planner.plan, planner.pending()
+            else:
+                # A restored game that hasn't stepped yet still has its planners' plans here
+                planned = self.planned.get(board.index)
+            if planned is not None:
+                plan, finished = planned
+                arrays[prefix + 'planner_plan'] = np.array(plan_number(plan))
+                arrays[prefix + 'planner_finished'] = np.array([(due, plan_number(plan)) for due, plan in finished],
+                                                               np.int64).reshape(-1, 2)
+        arrays['plans'] = np.array([(plan.frame, plan.nodes, plan.complete, len(plan.shots)) for plan in plans],
+                                   np.int64).reshape(-1, 4)
+        arrays['plan_shots'] = np.array([shot for plan in plans for shot in plan.shots], np.float64).reshape(-1, 2)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Rebuilds a game from to_arrays. It doesn't plan in realtime, so it plays out the same every time
+        Parameters:
+            - arrays (dict): Name -> numpy.ndarray, as made by to_arrays
+        Returns:
+            GameEngine: The game
+        """
+        wave_enemies = arrays['wave_enemies'].tolist()
+        game = cls(int(arrays['seed']), human=bool(arrays['human']),
+                   ai_levels=[level or None for level in arrays['ai_levels'].tolist()],
+                   wave_enemies=wave_enemies[0] if wave_enemies else None)
+        gauss_next = arrays['rng_gauss_next'].tolist()
+        game.rng.setstate((int(arrays['rng_version']), tuple(arrays['rng_internal'].tolist()),
+                           gauss_next[0] if gauss_next else None))
+        for name in SAVED_COUNTERS:
+            setattr(game, name, arrays[name].item())
+        game.time = game.frame * STEP_TIME
+        game.shots = arrays['shots'].tolist()
+        game.kills = arrays['kills'].tolist()
+        game.missed = arrays['missed'].tolist()
+        game.pending = collections.deque(
+            (due, start, x, y, board) for (due, start, board), (x, y)
+            in zip(arrays['pending_frames'].tolist(), arrays['pending_positions'].tolist()))
+
+        store = game.store = entities.EntityStore.from_arrays(
+            {name[len('store.'):]: array for name, array in arrays.items() if name.startswith('store.')})
+        # One handle per slot in use. Those nothing in the game refers to, such as a fading sprite's,
+        # give their slots back once this returns
+        free = set(store.free)
+        handles = {slot: (Enemy if store.kind_items[slot] == entities.KIND_ENEMY else Missile).at(store, slot)
+                   for slot in range(store.size) if slot not in free}
+        handle = handles.__getitem__
+        game.events = [('death', handle(slot), game.boards[board].ship) if death else ('kill', handle(slot))
+                       for death, slot, board in arrays['events'].tolist()]
+
+        plans = []
+        shots = iter(arrays['plan_shots'].tolist())
+        for frame, nodes, complete, count in arrays['plans'].tolist():
+            plan_shots = tuple((x, int(shot_frame)) for x, shot_frame in itertools.islice(shots, count))
+            plans.append(lookahead.Plan(frame, plan_shots, nodes, bool(complete)))
+
+        def plan_at(number):
+            return plans[number] if number >= 0 else None
+
+        for board in game.boards:
+            prefix = f'board{board.index}.'
+            ship = board.ship
+            (ship.center_x, ship.center_y, ship.prev_x, ship.prev_y,
+             ship.change_x, ship.change_y) = arrays[prefix + 'ship'].tolist()
+            ship.alive = bool(arrays[prefix + 'ship_alive'])
+            board.out = bool(arrays[prefix + 'out'])
+            board.enemies = list(map(handle, arrays[prefix + 'enemies'].tolist()))
+            board.missiles = list(map(handle, arrays[prefix + 'missiles'].tolist()))
+            board.dormant = list(map(handle, arrays[prefix + 'dormant'].tolist()))
+            board.targets = BoardTargetIndex.from_arrays(
+                {name[len(prefix + 'targets.'):]: array for name, array in arrays.items()
+                 if name.startswith(prefix + 'targets.')}, handle)
+            board.last_shot = float(arrays[prefix + 'last_shot'])
+            lowest_y = int(arrays[prefix + 'lowest_y'])
+            board.lowest_y = handle(lowest_y) if lowest_y >= 0 else None
+            board.finding_target = bool(arrays[prefix + 'finding_target'])
+            board.counter, board.counter_adder = arrays[prefix + 'counter'].tolist()
+            board.plan = plan_at(int(arrays[prefix + 'plan']))
+            board.plan_step, board.next_fire_frame, board.next_plan_frame = arrays[prefix + 'plan_frames'].tolist()
+            if prefix + 'planner_plan' in arrays:
+                game.planned[board.index] = (plan_at(int(arrays[prefix + 'planner_plan'])),
+                                             [(due, plan_at(number)) for due, number
+                                              in arrays[prefix + 'planner_finished'].tolist()])
+        return game
+
+    def fire(self, ship):
+        missile = Missile(self.store, ship.center_x, ship.center_y + 50, ship.board)
+        self.boards[ship.board].missiles.append(missile)
+        self.shots[ship.board] += 1
+        if self.telemetry:
+            self.telemetry.shot(self, ship.board)
+        return missile
+
+    def current_ai_level(self, board=AI_BOARD):
+        """ Level of the AI playing a board now, None once every wave is over """
+        level = self.boards[board].ai_level
+        if level is not None and self.wave <= 12:
+            return level
+        return wave_ai_level(self.wave)
+
+    def step(self):
+        """
+        Advances the game by one fixed step: AI behavior, enemy spawning, collision detection and
+        checking if the game is over. Events from this step are left in self.events as tuples:
+            - ('kill', enemy): enemy was destroyed by a missile
+            - ('death', enemy, ship): enemy reached a ship and blew it up
+        Parameters:
+            - self (GameEngine): This class instance
+        Returns:
+            bool: False once the game has finished
+        """
+        self.events = []
+        if self.finished:
+            return False
+        if self.wave == 13:
+            self.game_over = 2
+        if self.game_over and self.time_since_game_over + GAME_OVER_DELAY <= self.time:
+            self.finished = True
+            return False
+
+        profiler = self.profiler
+        boards = self.boards
+        # Ships don't move every step, so they start each step where they ended the last
+        for board in boards:
+            ship = board.ship
+            ship.prev_x, ship.prev_y = ship.center_x, ship.center_y
+        # Ensure player stays within game bounds
+        player = self.player
+        if ((player.center_x > 25 or player.change_x != -PLAYER_SPEED) and
+                (player.center_x < 475 or player.change_x != PLAYER_SPEED)):
+            player.update()
+        else:
+            player.change_x = 0
+        if profiler:
+            profiler.lap('player')
+
+        for board in boards[AI_BOARD:]:
+            if not board.out:
+                self.update_ai(board)
+        if profiler:
+            profiler.lap('ai')
+
+        # No enemies means the wave has been beaten, so move onto next wave and spawn the enemies
+        if not self.enemies_left():
+            self.spawn_wave()
+        for enemy in self.due_spawns():
+            self.add_enemy(enemy)
+        if profiler:
+            profiler.lap('spawn')
+
+        for board in boards:
+            self.check_collisions(board)
+        if profiler:
+            profiler.lap('collision')
+
+        # Missiles and enemies update regardless of player movement, all of them at once. Missiles
+        # that were already past the top of the board are gone instead and count as misses
+        missed = self.missed
+        for index in self.store.move(SCREEN_HEIGHT).tolist():
+            missed[index] += 1
+            if self.telemetry:
+                self.telemetry.miss(self, index)
+        culled = 0
+        for board in boards:
+            dormant = board.dormant
+            if dormant:
+                # They fall in spawn order, so the ones waking up are at the front and join the
+                # other enemies in the same order they would have spawned in
+                woken = 0
+                while woken < len(dormant) and dormant[woken].center_y < DORMANT_Y:
+                    woken += 1
+                if woken:
+                    board.enemies.extend(dormant[:woken])
+                    del dormant[:woken]
+                culled += len(dormant)
+        # Nothing to drop unless something died this step
+        if self.store.deaths:
+            for board in boards:
+                self.prune(board)
+            self.store.deaths = 0
+        self.culled = culled
+        if profiler:
+            profiler.lap('movement')
+
+        self.frame += 1
+        self.time = self.frame * STEP_TIME
+        if self.recorder:
+            self.recorder.after_step(self)
+        return True
+
+    def update_ai(self, board):
+        """
+        Moves and fires for the AI player of a board, type of 'AI' depends on wave number, every 3rd
+        wave a new algorithm takes over, unless the board's level was fixed when the game was created
+        Parameters:
+            - self (GameEngine): This class instance
+            - board (Board): AI board to play
+        Returns:
+            None
+        """
+        ai_player = board.ship
+        level = self.current_ai_level(board.index)
+        if level == 1:
+            # First algorithm is a CPU controlled by a random number generator
+            if board.last_shot + 0.25 < self.time:
+                ai_player.teleport(self.rng.randint(0, 9) * 50 + 25 + board.offset)
+                self.fire(ai_player)
+                board.last_shot = self.time
+        # Level 2 AI, shoot every 50 pixels back and forth
+        elif level == 2:
+            if board.last_shot + 0.32 < self.time:
+                ai_player.teleport(board.counter * 50 + 25 + board.offset)
+                self.fire(ai_player)
+                board.last_shot = self.time
+                if board.counter == 0:
+                    board.counter_adder = 1
+                elif board.counter == 9:
+                    board.counter_adder = -1
+                board.counter += board.counter_adder
+        # Level 3 AI, shoot lowest enemy
+        elif level == 3:
+            if self.enemies_left() and not self.game_over:
+                # Target the lowest enemy on the AI's board that hasn't already been shot at, or
+                # keep the last target while none are visible
+                targets = board.targets
+                target = targets.lowest_target(SCREEN_HEIGHT)
+                if target is not None:
+                    board.lowest_y = target
+                if board.lowest_y is None:
+                    return
+                target_x = board.lowest_y.center_x
+
+                # If AI player is to the left of enemy, move to the right
+                # If AI player is to the right of enemy, move to the left
+                # If AI player is underneath an enemy's hitbox, fire once then ignore that enemy
+                if ai_player.center_x < target_x - 10:
+                    ai_player.change_x = 5
+                    board.finding_target = True
+                elif ai_player.center_x > target_x + 10:
+                    ai_player.change_x = -5
+                    board.finding_target = True
+                elif not targets.is_shot(board.lowest_y):
+                    ai_player.change_x = 0
+                    self.fire(ai_player)
+                    targets.mark_shot(board.lowest_y)
+                    board.finding_target = False
+                ai_player.update()
+        # Level 4 AI, shoots at all enemies, prioritizing lower ones
+        elif level == 4:
+            if self.enemies_left() and not self.game_over:
+                # Fire at every visible enemy not already shot at that the AI is lined up with
+                targets = board.targets
+                for enemy in targets.aligned_unshot(ai_player.center_x, 10, SCREEN_HEIGHT):
+                    self.fire(ai_player)
+                    targets.mark_shot(enemy)
+                # Then move towards the lowest enemy left
+                target = targets.lowest_unshot(SCREEN_HEIGHT)
+                if target is not None:
+                    if ai_player.center_x < target.center_x - 10:
+                        ai_player.change_x = 4
+                    elif ai_player.center_x > target.center_x + 10:
+                        ai_player.change_x = -4
+                    ai_player.update()
+        # Level 5 AI, follows a plan made by looking a few seconds ahead
+        elif level == 5:
+            if self.enemies_left() and not self.game_over:
+                self.follow_plan(board)
+
+    def follow_plan(self, board):
+        """
+        Moves and fires for a level 5 AI: switches to its planner's newest plan, lines up with the
+        plan's next shot and fires it once it is due, then asks for a new plan after every shot and
+        every lookahead.PLAN_INTERVAL steps. Only reads the newest plan, the planning itself happens
+        on the planner's worker thread
+        Parameters:
+            - self (GameEngine): This class instance
+            - board (Board): AI board to play
+        Returns:
+            None
+        """
+        planner = self.planners.get(board.index)
+        if planner is None:
+            planner = self.planners[board.index] = lookahead.LookaheadPlanner(self.realtime_planning)
+            if board.index in self.planned:
+                planner.plan, finished = self.planned.pop(board.index)
+                planner.finished.extend(finished)
+        # Plans made from before the last shot don't know about its missile, keep the current one
+        plan = planner.latest(self.frame)
+        if (plan is not None and plan is not board.plan and
+                plan.frame >= board.next_fire_frame - lookahead.FIRE_DELAY_STEPS):
+            board.plan = plan
+            board.plan_step = 0
+
+        ai_player = board.ship
+        fired = False
+        if board.plan is not None and board.plan_step < len(board.plan.shots):
+            target_x, fire_frame = board.plan.shots[board.plan_step]
+            if abs(target_x - ai_player.center_x) > lookahead.AIM_TOLERANCE:
+                ai_player.change_x = math.copysign(PLAYER_SPEED, target_x - ai_player.center_x)
+                ai_player.update()
+            ai_player.change_x = 0
+            if (abs(target_x - ai_player.center_x) <= lookahead.AIM_TOLERANCE and
+                    self.frame >= max(fire_frame, board.next_fire_frame)):
+                self.fire(ai_player)
+                board.last_shot = self.time
+                board.plan_step += 1
+                board.next_fire_frame = self.frame + lookahead.FIRE_DELAY_STEPS
+                fired = True
+
+        if fired or self.frame >= board.next_plan_frame:
+            planner.submit(lookahead.snapshot(self, board))
+            board.next_plan_frame = self.frame + lookahead.PLAN_INTERVAL
+
+    def spawn_wave(self):
+        """
+        Moves onto the next wave and schedules its enemies on every board still playing, at the same
+        spots on each board. The human's board is skipped when the human isn't playing. Every spawn
+        position is drawn now, so the random numbers are used in the same order as ever, but each
+        enemy is only created by due_spawns shortly before it falls onto its board
+        Parameters:
+            - self (GameEngine): This class instance
+        Returns:
+            None
+        """
+        self.wave += 1
+        # Ramp the difficulty by increasing enemies per y every 3 waves
+        if self.wave % 3 == 0:
+            self.enemies_per_y += 1
+        boards = [board for board in self.boards if board.active and not board.out]
+        if self.wave_enemies is not None:
+            # Stress waves put every enemy on the board at once, anywhere in its top half
+            for _ in range(self.wave_enemies):
+                spawn_x = self.rng.randrange(10) * 50 + 25
+                spawn_y = self.rng.uniform(SCREEN_HEIGHT / 2, SCREEN_HEIGHT)
+                for board in boards:
+                    self.pending.append((self.frame, self.frame, spawn_x + board.offset, spawn_y, board.index))
+            return
+        # Spawn 3 + (2 * wave# % 3) * enemies_per_y enemies per wave
+        for y in range(3 + 2*(self.wave % 3)):
+            # every 200 pixels is a new y level, the row is due once it has fallen to SPAWN_MARGIN above the board
+            spawn_y = SCREEN_HEIGHT + 200*y
+            due = self.frame + max(0, math.ceil((spawn_y - SCREEN_HEIGHT - SPAWN_MARGIN) / -ENEMY_SPEED))
+            for x in range(self.enemies_per_y):
+                # Split the screen width depending on the enemies per y, spawning one enemy in each section
+                spawn_x = self.rng.randrange(10*x//self.enemies_per_y, 10*(x+1)//self.enemies_per_y) * 50 + 25
+                for board in boards:
+                    self.pending.append((due, self.frame, spawn_x + board.offset, spawn_y, board.index))
+
+    def due_spawns(self):
+        """
+        Creates the scheduled enemies that are due this step, where they would be had they been
+        falling since their wave started
+        Parameters:
+            - self (GameEngine): This class instance
+        Returns:
+            generator: The new enemies, in spawn order
+        """
+        pending = self.pending
+        while pending and pending[0][0] <= self.frame:
+            due, start, spawn_x, spawn_y, board = pending.popleft()
+            yield Enemy(self.store, spawn_x, spawn_y + ENEMY_SPEED * (self.frame - start), board)
+
+    def add_enemy(self, enemy):
+        """
+        Puts a new enemy in play and in its board's target index
+        Parameters:
+            - self (GameEngine): This class instance
+            - enemy (Enemy): The enemy
+        Returns:
+            None
+        """
+        board = self.boards[enemy.board]
+        self.store.born_items[enemy.slot] = self.frame
+        if enemy.center_y >= DORMANT_Y:
+            board.dormant.append(enemy)
+        else:
+            board.enemies.append(enemy)
+        # Every enemy falls at the same speed, so its height on frame 0 orders it against the others
+        board.targets.add(enemy, enemy.center_y - enemy.change_y * self.frame)
+
+    def prune(self, board):
+        """ Drops the dead enemies and missiles of a board, dead enemies leave its target index too """
+        alive = self.store.alive
+        enemies = board.enemies
+        enemies_alive = alive[self.store.slots(enemies)]
+        if not enemies_alive.all():
+            for index in np.flatnonzero(~enemies_alive).tolist():
+                board.targets.remove(enemies[index])
+            board.enemies = list(itertools.compress(enemies, enemies_alive.tolist()))
+        missiles_alive = alive[self.store.slots(board.missiles)]
+        if not missiles_alive.all():
+            board.missiles = list(itertools.compress(board.missiles, missiles_alive.tolist()))
+
+    def check_collisions(self, board):
+        """
+        If enemy and missile are colliding on a board, destroy them both, then check if any enemies
+        have reached the board's ship. An enemy keeps checking the remaining missiles after it is hit,
+        so two missiles arriving together are both used up and both score. Every enemy and missile is
+        tested at once from the store's columns, and only the enemies that were hit or are low enough
+        go through these rules one at a time, in the order of board.enemies
+        Parameters:
+            - self (GameEngine): This class instance
+            - board (Board): Board to check
+        Returns:
+            None
+        """
+        enemies = board.enemies
+        if not enemies:
+            return
+        store = self.store
+        enemy_slots = store.slots(enemies)
+        enemy_x = store.x[enemy_slots]
+        enemy_y = store.y[enemy_slots]
+        # Enemy index -> indexes of the missiles overlapping it, in order
+        hits = {}
+        missiles = board.missiles
+        if missiles:
+            missile_slots = store.slots(missiles)
+            missile_x = store.x[missile_slots]
+            missile_y = store.y[missile_slots]
+            if len(enemies) * len(missiles) <= BROADCAST_PAIRS:
+                # Few enough to test every pair
+                x, y = enemy_x[:, np.newaxis], enemy_y[:, np.newaxis]
+                other_x, other_y = missile_x, missile_y
+            else:
+                # Only pairs sharing a grid cell can overlap
+                first, second = cell_pairs(box_bounds(enemy_x, enemy_y, ENEMY_HIT_BOX),
+                                           box_bounds(missile_x, missile_y, MISSILE_HIT_BOX))
+                x, y = enemy_x[first], enemy_y[first]
+                other_x, other_y = missile_x[second], missile_y[second]
+            overlap = boxes_overlap(x, y, ENEMY_HIT_BOX, other_x, other_y, MISSILE_HIT_BOX)
+            if overlap.ndim == 2:
+                first, second = np.nonzero(overlap)
+            else:
+                first, second = first[overlap], second[overlap]
+            for enemy_index, missile_index in zip(first.tolist(), second.tolist()):
+                hits.setdefault(enemy_index, []).append(missile_index)
+        reached = np.flatnonzero(enemy_y <= 50).tolist()
+
+        for index in sorted(hits.keys() | set(reached)):
+            enemy = enemies[index]
+            for missile_index in hits.get(index, ()):
+                missile = missiles[missile_index]
+                if missile.alive:
+                    enemy.kill()
+                    missile.kill()
+                    # If a player kill, increase score
+                    if board.index == PLAYER_BOARD:
+                        self.score += 10
+                    self.kills[board.index] += 1
+                    self.events.append(('kill', enemy))
+                    if self.telemetry:
+                        self.telemetry.kill(self, board.index, (self.frame - enemy.born) * STEP_TIME)
+            # If enemy has reached the ship's y level, blow the ship up
+            if enemy.center_y <= 50 and not self.game_over:
+                ship = board.ship
+                self.events.append(('death', enemy, ship))
+                if self.telemetry:
+                    self.telemetry.death(self, board.index)
+                enemy.kill()
+                ship.kill()
+                if board.index != PLAYER_BOARD and any(not other.out for other in self.boards[AI_BOARD:]
+                                                       if other is not board):
+                    # Other AIs are still playing, only this board is out
+                    self.knock_out(board)
+                    return
+                # The game ends when the human dies or the last AI does
+                self.game_over = 1 if board.index == PLAYER_BOARD else 2
+                self.time_since_game_over = self.time
+
+    def knock_out(self, board):
+        """ Takes a board whose AI died out of the game, its enemies are cleared and no more spawn there """
+        board.out = True
+        for enemy in board.enemies:
+            enemy.kill()
+        for enemy in board.dormant:
+            enemy.kill()
+            board.targets.remove(enemy)
+        board.dormant = []
+        self.pending = collections.deque(spawn for spawn in self.pending if spawn[4] != board.index)
@@ -0,0 +1,186 @@
+import operator
+
+import numpy as np
+
+# Struct-of-arrays storage for the engine's enemies and missiles. Every entity is a slot,
+# one row across the columns below, and the engine's Enemy and Missile objects are only
+# small handles holding their store and slot. Moving every enemy and missile is then a
+# few array operations per step instead of a method call per entity, and an entity takes
+# a few dozen bytes of columns rather than a whole Python object with its own dict.
+#
+# A slot is reused once its handle is gone, not as soon as the entity dies: whatever still
+# holds a dead entity, such as an AI's last target or a sprite fading out, can still read
+# where it was.
+
+# Slots a new store has room for, it doubles whenever it runs out
+INITIAL_CAPACITY = 256
+
+# What a slot holds
+KIND_ENEMY = 1
+KIND_MISSILE = 2
+
+# Float columns, kept as the rows of one array in this order so move() can update x and y
+# together. prev_x and prev_y are where the entity was at the start of the current step,
+# drawing blends from there to x, y
+FLOAT_COLUMNS = ('x', 'y', 'prev_x', 'prev_y', 'change_x', 'change_y')
+# The other columns, name -> dtype. board is the board the entity belongs to, born the step
+# an enemy came into play on
+COLUMNS = {'alive': np.bool_, 'board': np.int32, 'kind': np.int8, 'born': np.int32}
+
+_slot_of = operator.attrgetter('slot')
+
+
+class EntityStore:
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        """
+        Class constructor, creates an empty store
+        Parameters:
+            - self (EntityStore): This class instance
+            - capacity (int): Slots to make room for up front
+        Returns:
+            None
+        """
+        # Slots handed out so far, every slot from here up is unused
+        self.size = 0
+        # Slots below size whose handles are gone, ready to be handed out again
+        self.free = []
+        # Entities killed since the engine last dropped its dead ones
+        self.deaths = 0
+        self.capacity = 0
+        self.values = np.zeros((len(FLOAT_COLUMNS), 0))
+        for name, dtype in COLUMNS.items():
+            setattr(self, name, np.zeros(0, dtype))
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        """ Makes room for capacity slots, keeping what the used ones hold """
+        values = np.zeros((len(FLOAT_COLUMNS), capacity))
+        values[:, :self.size] = self.values[:, :self.size]
+        self.values = values
+        for name in COLUMNS:
+            old = getattr(self, name)
+            column = np.zeros(capacity, old.dtype)
+            column[:self.size] = old[:self.size]
+            setattr(self, name, column)
+        self.capacity = capacity
+        self._make_views()
+
+    def _make_views(self):
+        for row, name in enumerate(FLOAT_COLUMNS):
+            setattr(self, name, self.values[row])
+        # A memoryview of each column, reading one slot from it gives a plain Python value and is
+        # much quicker than indexing the array, handles use these
+        for name in FLOAT_COLUMNS + tuple(COLUMNS):
+            setattr(self, name + '_items', getattr(self, name).data)
+
+    def to_arrays(self):
+        """ The columns of the slots handed out so far and the free slots, as named arrays for keyframes """
+        # The unused end of each column isn't worth keeping
+        arrays = {name: getattr(self, name)[:self.size] for name in COLUMNS}
+        arrays['values'] = self.values[:, :self.size]
+        arrays['free'] = np.array(self.free, np.int64)
+        arrays['deaths'] = np.array(self.deaths)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Rebuilds a store from to_arrays
+        Parameters:
+            - arrays (dict): Name -> numpy.ndarray, as made by to_arrays
+        Returns:
+            EntityStore: The store, without handles for its slots, see GameEngine.from_arrays
+        """
+        size = arrays['values'].shape[1]
+        store = cls(max(INITIAL_CAPACITY, size))
+        store.size = size
+        store.values[:, :size] = arrays['values']
+        for name in COLUMNS:
+            getattr(store, name)[:size] = arrays[name]
+        store.free = arrays['free'].tolist()
+        store.deaths = int(arrays['deaths'])
+        return store
+
+    def __len__(self):
+        """ Slots in use, by live entities or dead ones something still holds """
+        return self.size - len(self.free)
+
+    def add(self, kind, x, y, change_y, board):
+        """
+        Takes a slot for a new entity
+        Parameters:
+            - self (EntityStore): This class instance
+            - kind (int): KIND_ENEMY or KIND_MISSILE
+            - x, y (float): Where it starts
+            - change_y (float): How far it falls or rises each step
+            - board (int): Board it belongs to
+        Returns:
+            int: Its slot
+        """
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.size == self.capacity:
+                self._grow(self.capacity * 2)
+            slot = self.size
+            self.size += 1
+        self.x_items[slot] = self.prev_x_items[slot] = x
+        self.y_items[slot] = self.prev_y_items[slot] = y
+        self.change_x_items[slot] = 0
+        self.change_y_items[slot] = change_y
+        self.alive_items[slot] = True
+        self.board_items[slot] = board
+        self.kind_items[slot] = kind
+        self.born_items[slot] = 0
+        return slot
+
+    def release(self, slot):
+        """ Hands a slot back once nothing refers to its entity """
+        self.alive_items[slot] = False
+        self.free.append(slot)
+
+    def slots(self, entities):
+        """ Slots of a list of handles, as an array to index the columns with """
+        return np.fromiter(map(_slot_of, entities), np.intp, len(entities))
+
+    def move(self, missile_top):
+        """
+        One step of movement for every live enemy and missile: each remembers where it was and
+        moves by its change, except missiles already above missile_top, which die instead
+        Parameters:
+            - self (EntityStore): This class instance
+            - missile_top (float): Missiles higher than this have left the board
+        Returns:
+            numpy.ndarray: Board of each missile that left, for counting misses
+        """
+        size = self.size
+        alive = self.alive[:size]
+        gone = alive & (self.kind[:size] == KIND_MISSILE) & (self.y[:size] > missile_top)
+        if gone.any():
+            alive[gone] = False
+            self.deaths += int(gone.sum())
+        values = self.values[:, :size]
+        position = values[0:2]
+        np.copyto(values[2:4], position, where=alive)
+        np.add(position, values[4:6], out=position, where=alive)
+        return self.board[:size][gone]
+
+    def interpolated(self, slots, alpha):
+        """
+        Where a group of entities should be drawn, between the previous step (alpha 0) and the current
+        one (alpha 1), same as Entity.interpolated for each of them
+        Parameters:
+            - self (EntityStore): This class instance
+            - slots (numpy.ndarray): Their slots
+            - alpha (float): How far between the two steps
+        Returns:
+            tuple: x and y arrays
+        """
+        prev_x = self.prev_x[slots]
+        prev_y = self.prev_y[slots]
+        return (prev_x + (self.x[slots] - prev_x) * alpha,
+                prev_y + (self.y[slots] - prev_y) * alpha)
+
+    def nbytes(self):
+        """ Bytes the columns take up """
+        return self.values.nbytes + sum(getattr(self, name).nbytes for name in COLUMNS)
@@ -0,0 +1,279 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from broadphase import boxes_overlap
+from engine import (SCREEN_WIDTH, SCREEN_HEIGHT, STEP_TIME, PLAYER_SPEED, ENEMY_SPEED, MISSILE_SPEED,
+                    PLAYER_FIRE_DELAY, ENEMY_HIT_BOX, MISSILE_HIT_BOX)
+
+# Batched environment for training agents on the player's board. K games are kept in
+# NumPy arrays and advanced together, one call to step() moves all of them by one fixed
+# step. The rules are the engine's: same speeds, fire delay, spawn formula, hit boxes and
+# score, and each game draws its enemy positions from random.Random(seed) in the same
+# order the engine does, so a game plays out exactly like a solo
+# GameEngine(seed, ai_levels=[]) given the same inputs. Unlike the engine, a game ends as
+# soon as the ship dies or wave 13 is reached, without the engine's game over delay.
+
+# Actions, one per game per step
+ACTION_NOOP = 0
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_FIRE = 3
+ACTION_LEFT_FIRE = 4
+ACTION_RIGHT_FIRE = 5
+NUM_ACTIONS = 6
+
+# Most enemies in a wave: 7 rows with 5 enemies per row by wave 12
+MAX_ENEMIES = 35
+# Most missiles in flight: one every 0.5 seconds, each lasting about 2.3 seconds
+MAX_MISSILES = 8
+
+# Ship height and where missiles start, as in the engine
+SHIP_Y = 25
+MISSILE_SPAWN_Y = SHIP_Y + 50
+# Enemies at or below this height blow the ship up
+DEATH_Y = 50
+SCORE_PER_KILL = 10
+LAST_WAVE = 12
+
+# Observation layout: ship x, fire cooldown left, wave, then x, y and alive for every
+# enemy slot and every missile slot. Positions are divided by the board size
+OBSERVATION_SIZE = 3 + 3 * MAX_ENEMIES + 3 * MAX_MISSILES
+
+
+class BatchEnv:
+    def __init__(self, num_envs, auto_reset=True):
+        """
+        Class constructor, allocates the arrays for num_envs games, call reset before stepping
+        Parameters:
+            - self (BatchEnv): This class instance
+            - num_envs (int): Number of games advanced by each step
+            - auto_reset (bool): Start a new game in the slot of each game that ends, otherwise a game
+              that ended stays as it was, with no reward, until reset
+        Returns:
+            None
+        """
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+        k = num_envs
+        # Seed of each game, and its random generator for enemy spawns
+        self.seeds = np.zeros(k, dtype=np.int64)
+        self.rngs = [None] * k
+        self.frame = np.zeros(k, dtype=np.int64)
+        self.wave = np.zeros(k, dtype=np.int64)
+        self.enemies_per_y = np.ones(k, dtype=np.int64)
+        self.score = np.zeros(k, dtype=np.int64)
+        self.ship_x = np.zeros(k)
+        # Time of the last shot, fire is allowed PLAYER_FIRE_DELAY after it
+        self.last_shot = np.zeros(k)
+        # Enemy slots are filled in spawn order, which is also the order the engine checks them in
+        self.enemy_x = np.zeros((k, MAX_ENEMIES))
+        self.enemy_y = np.zeros((k, MAX_ENEMIES))
+        self.enemy_alive = np.zeros((k, MAX_ENEMIES), dtype=bool)
+        self.missile_x = np.zeros((k, MAX_MISSILES))
+        self.missile_y = np.zeros((k, MAX_MISSILES))
+        self.missile_alive = np.zeros((k, MAX_MISSILES), dtype=bool)
+        # Per-game totals for the current episode
+        self.kills = np.zeros(k, dtype=np.int64)
+        self.shots = np.zeros(k, dtype=np.int64)
+        self.missed = np.zeros(k, dtype=np.int64)
+        # 0 while a game is playing, then how it ended, see step
+        self.game_over = np.zeros(k, dtype=np.int64)
+        # Episodes finished in each slot, new seeds for auto resets follow on from it
+        self.episodes = np.zeros(k, dtype=np.int64)
+
+    def reset(self, seed=None):
+        """
+        Starts a new game in every slot, game i is seeded with seed + i
+        Parameters:
+            - self (BatchEnv): This class instance
+            - seed (int): Seed of the first game, random if None
+        Returns:
+            np.ndarray: Observations, shape (num_envs, OBSERVATION_SIZE)
+        """
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seeds[:] = seed + np.arange(self.num_envs)
+        self.episodes[:] = 0
+        self._reset_games(np.arange(self.num_envs))
+        return self.observe()
+
+    def _reset_games(self, games):
+        for i in games:
+            self.rngs[i] = random.Random(int(self.seeds[i]))
+        self.frame[games] = 0
+        self.wave[games] = 0
+        self.enemies_per_y[games] = 1
+        self.score[games] = 0
+        self.ship_x[games] = SCREEN_WIDTH / 2
+        self.last_shot[games] = 0.0
+        self.enemy_alive[games] = False
+        self.missile_alive[games] = False
+        self.kills[games] = 0
+        self.shots[games] = 0
+        self.missed[games] = 0
+        self.game_over[games] = 0
+
+    def spawn_wave(self, i):
+        """ Moves game i onto its next wave and spawns the wave's enemies, as GameEngine.spawn_wave does """
+        self.wave[i] += 1
+        wave = self.wave[i]
+        if wave % 3 == 0:
+            self.enemies_per_y[i] += 1
+        per_y = int(self.enemies_per_y[i])
+        rng = self.rngs[i]
+        slot = 0
+        for y in range(3 + 2*(wave % 3)):
+            for x in range(per_y):
+                self.enemy_x[i, slot] = rng.randrange(10*x//per_y, 10*(x+1)//per_y) * 50 + 25
+                self.enemy_y[i, slot] = SCREEN_HEIGHT + 200*y
+                slot += 1
+        self.enemy_alive[i, :slot] = True
+        self.enemy_alive[i, slot:] = False
+
+    def step(self, actions):
+        """
+        Advances every game by one fixed step in the engine's order: fire, move the ship, spawn a wave
+        if the board is clear, missile hits, enemies reaching the ship, then enemies and missiles move
+        Parameters:
+            - self (BatchEnv): This class instance
+            - actions (array): One ACTION_* per game
+        Returns:
+            tuple: (observations, rewards, dones, info). Rewards are the score gained this step. info
+            holds 'game_over' (0 still playing, 1 ship died, 2 every wave beaten) and the final
+            'score' and 'wave' of each game that ended, from before any auto reset. Without auto reset
+            a game that ended is left as it was and stays done
+        """
+        actions = np.asarray(actions)
+        # Games that ended before this step are frozen, nothing in them moves
+        playing = self.game_over == 0
+        now = self.frame * STEP_TIME
+        score_before = self.score.copy()
+
+        # Fire from where the ship is before it moves, like a key press between steps
+        fire = playing & (actions >= ACTION_FIRE) & (self.last_shot <= now - PLAYER_FIRE_DELAY)
+        firing = np.flatnonzero(fire)
+        if len(firing):
+            slots = np.argmin(self.missile_alive[firing], axis=1)
+            self.missile_x[firing, slots] = self.ship_x[firing]
+            self.missile_y[firing, slots] = MISSILE_SPAWN_Y
+            self.missile_alive[firing, slots] = True
+            self.last_shot[firing] = now[firing]
+            self.shots[firing] += 1
+
+        # Move the ship, unless that would take it off the board
+        left = (actions == ACTION_LEFT) | (actions == ACTION_LEFT_FIRE)
+        right = (actions == ACTION_RIGHT) | (actions == ACTION_RIGHT_FIRE)
+        change_x = np.where(left, -PLAYER_SPEED, np.where(right, PLAYER_SPEED, 0))
+        allowed = playing & (((self.ship_x > 25) | (change_x != -PLAYER_SPEED)) &
+                   ((self.ship_x < 475) | (change_x != PLAYER_SPEED)))
+        self.ship_x += np.where(allowed, change_x, 0)
+
+        for i in np.flatnonzero(playing & ~self.enemy_alive.any(axis=1)):
+            self.spawn_wave(i)
+
+        # Hit boxes overlap, shape (games, enemies, missiles), the same test as the engine's
+        overlap = boxes_overlap(self.enemy_x[:, :, None], self.enemy_y[:, :, None], ENEMY_HIT_BOX,
+                                self.missile_x[:, None, :], self.missile_y[:, None, :], MISSILE_HIT_BOX)
+        live_enemies = self.enemy_alive & playing[:, None]
+        live_missiles = self.missile_alive & playing[:, None]
+        overlap &= live_enemies[:, :, None] & live_missiles[:, None, :]
+        # Each missile is used up by the first enemy it overlaps, and every missile used up scores
+        hit = overlap.any(axis=1)
+        games, missiles = np.nonzero(hit)
+        killed = np.zeros_like(self.enemy_alive)
+        killed[games, overlap[games, :, missiles].argmax(axis=1)] = True
+        hits = hit.sum(axis=1)
+        self.score += SCORE_PER_KILL * hits
+        self.kills += hits
+        self.missile_alive &= ~hit
+
+        # An enemy reaching the ship ends the game, even one hit this step
+        died = (live_enemies & (self.enemy_y <= DEATH_Y)).any(axis=1)
+        self.enemy_alive &= ~killed
+        live_enemies &= ~killed
+
+        self.enemy_y[live_enemies] += ENEMY_SPEED
+        # Missiles past the top of the board are gone, the rest keep climbing
+        gone = live_missiles & ~hit & (self.missile_y > SCREEN_HEIGHT)
+        self.missed += gone.sum(axis=1)
+        self.missile_alive &= ~gone
+        self.missile_y[live_missiles & ~gone & ~hit] += MISSILE_SPEED
+        self.frame += playing
+
+        rewards = self.score - score_before
+        self.game_over[playing] = np.where(died, 1, np.where(self.wave > LAST_WAVE, 2, 0))[playing]
+        dones = self.game_over != 0
+        info = {'game_over': self.game_over.copy(), 'score': self.score.copy(), 'wave': self.wave.copy()}
+        if self.auto_reset and dones.any():
+            finished = np.flatnonzero(dones)
+            self.episodes[finished] += 1
+            self.seeds[finished] += self.num_envs
+            self._reset_games(finished)
+        return self.observe(), rewards, dones, info
+
+    def observe(self):
+        """ Observations of every game, shape (num_envs, OBSERVATION_SIZE), float32 """
+        now = self.frame * STEP_TIME
+        cooldown = np.clip((self.last_shot + PLAYER_FIRE_DELAY - now) / PLAYER_FIRE_DELAY, 0, 1)
+        return np.concatenate([
+            (self.ship_x / SCREEN_WIDTH)[:, None],
+            cooldown[:, None],
+            (self.wave / LAST_WAVE)[:, None],
+            self.enemy_x / SCREEN_WIDTH,
+            self.enemy_y / SCREEN_HEIGHT,
+            self.enemy_alive,
+            self.missile_x / SCREEN_WIDTH,
+            self.missile_y / SCREEN_HEIGHT,
+            self.missile_alive,
+        ], axis=1).astype(np.float32)
+
+
+def random_policy(env, rng):
+    """ Uniformly random actions for every game """
+    return rng.integers(0, NUM_ACTIONS, env.num_envs)
+
+
+def lowest_policy(env, rng):
+    """ Moves under the lowest visible enemy and fires whenever it is lined up, like the level 3 AI """
+    visible = env.enemy_alive & (env.enemy_y < SCREEN_HEIGHT)
+    lowest = np.argmin(np.where(visible, env.enemy_y, np.inf), axis=1)
+    target_x = env.enemy_x[np.arange(env.num_envs), lowest]
+    offset = target_x - env.ship_x
+    actions = np.where(offset > 10, ACTION_RIGHT_FIRE, np.where(offset < -10, ACTION_LEFT_FIRE, ACTION_FIRE))
+    return np.where(visible.any(axis=1), actions, ACTION_NOOP)
+
+
+POLICIES = {'random': random_policy, 'lowest': lowest_policy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a batch of games with a simple policy and report steps per second')
+    parser.add_argument('--envs', type=int, default=1024, help='games stepped together')
+    parser.add_argument('--steps', type=int, default=2000, help='steps to run')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='lowest', help='policy choosing the actions')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    args = parser.parse_args()
+
+    env = BatchEnv(args.envs)
+    env.reset(args.seed)
+    rng = np.random.default_rng(args.seed)
+    policy = POLICIES[args.policy]
+    scores = []
+    waves = []
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, _, dones, info = env.step(policy(env, rng))
+        scores.extend(info['score'][dones])
+        waves.extend(info['wave'][dones])
+    seconds = time.perf_counter() - start
+    steps = args.envs * args.steps
+    print(f'{steps} steps in {seconds:.2f}s ({steps / seconds:.0f} steps/s)')
+    if scores:
+        print(f'{len(scores)} games finished, average score {np.mean(scores):.1f}, average wave {np.mean(waves):.2f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
-import random
-import math
+import numpy as np
 import arcade
+from arcade.gl import BufferDescription
+
+import assets
+
+from pool import PoolStats
 
 # Source: https://api.arcade.academy/en/stable/examples/sprite_explosion_particles.html
 
@@ -45,76 +49,328 @@ SMOKE_RISE_RATE = 0.3
 SMOKE_CHANCE = 0.4
 
 
-class Smoke(arcade.SpriteCircle):
-    """ This represents a puff of smoke """
-    def __init__(self, size):
-        super().__init__(size, arcade.color.LIGHT_GRAY, soft=True)
-        self.change_y = SMOKE_RISE_RATE
-        self.scale = SMOKE_START_SCALE
+# Color of smoke puffs
+SMOKE_COLOR = arcade.color.LIGHT_GRAY
 
-    def update(self):
-        """ Update this particle """
-        if self.alpha <= PARTICLE_FADE_RATE:
-            # Remove faded out particles
-            self.remove_from_sprite_lists()
-        else:
-            # Update values
-            self.alpha -= SMOKE_FADE_RATE
-            self.center_x += self.change_x
-            self.center_y += self.change_y
-            self.scale += SMOKE_EXPANSION_RATE
-
-class Particle(arcade.SpriteCircle):
-    """ Explosion particle """
-    def __init__(self, my_list):
-        # Choose a random color
-        color = random.choice(PARTICLE_COLORS)
+# Smoke is a soft circle with this radius when it comes off the explosion, and
+# this radius when it trails behind a particle
+SMOKE_EXPLOSION_SIZE = 50
+SMOKE_TRAIL_SIZE = 5
+
+# Particles are drawn as points, sized and faded per point by this shader. Each
+# point is textured with its kind's effect texture (particle or smoke, sparkles use
+# the particle's), which the asset manager draws once at startup.
+VERTEX_SHADER = """
+#version 330
+
+uniform Projection {
+    uniform mat4 matrix;
+} proj;
+
+in vec2 in_pos;
+in float in_size;
+in vec4 in_color;
+in float in_kind;
+
+out vec4 v_color;
+out float v_kind;
+
+void main() {
+    gl_Position = proj.matrix * vec4(in_pos, 0.0, 1.0);
+    gl_PointSize = in_size;
+    v_color = in_color;
+    v_kind = in_kind;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330
+
+uniform sampler2D effects;
+uniform float kinds;
+
+in vec4 v_color;
+in float v_kind;
+
+out vec4 f_color;
+
+void main() {
+    vec4 mask = texture(effects, vec2((v_kind + gl_PointCoord.x) / kinds, gl_PointCoord.y));
+    if (mask.a == 0.0) discard;
+    f_color = v_color * mask;
+}
+"""
+
+# Most particles and smoke puffs alive at once, more are dropped
+EMITTER_MAX_CAPACITY = 16384
 
-        # Make the particle
-        super().__init__(PARTICLE_RADIUS, color)
 
-        # Track normal particle texture, so we can 'flip' when we sparkle.
-        self.normal_texture = self.texture
+class ExplosionQuality:
+    """ How much each explosion makes, at one of the quality levels below """
+    def __init__(self, particle_count, smoke_chance, sparkle_chance, smoke_scale, max_live):
+        # Particles per explosion
+        self.particle_count = particle_count
+        # Chance each frame that a particle leaves smoke, and that it sparkles
+        self.smoke_chance = smoke_chance
+        self.sparkle_chance = sparkle_chance
+        # Size of smoke puffs relative to SMOKE_EXPLOSION_SIZE and SMOKE_TRAIL_SIZE
+        self.smoke_scale = smoke_scale
+        # Most particles and smoke puffs alive at once
+        self.max_live = max_live
 
-        # Keep track of the list we are in, so we can add a smoke trail
-        self.my_list = my_list
 
+# Quality levels from cheapest to full, picked by a quality.QualityController
+QUALITY_LEVELS = [
+    ExplosionQuality(8, 0.1, 0.0, 0.5, 512),
+    ExplosionQuality(12, 0.2, 0.02, 0.7, 1024),
+    ExplosionQuality(18, 0.3, 0.03, 0.85, 4096),
+    ExplosionQuality(PARTICLE_COUNT, SMOKE_CHANCE, PARTICLE_SPARKLE_CHANCE, 1.0, EMITTER_MAX_CAPACITY),
+]
+
+# Layout of one point in the vertex buffer
+VERTEX_DTYPE = np.dtype([('pos', 'f4', 2), ('size', 'f4'), ('color', 'u1', 4), ('kind', 'f4')])
+
+
+class ExplosionEmitter:
+    """
+    Every explosion particle and smoke puff in the game. Their state lives in
+    NumPy arrays so a frame's update is a handful of array operations, and they
+    are drawn as one batch of points.
+    """
+    def __init__(self, capacity=1024, max_capacity=EMITTER_MAX_CAPACITY, seed=None):
+        # Explosions are purely visual, so they have their own random numbers
+        # and never disturb the game simulation's
+        self.rng = np.random.default_rng(seed)
+        # Number of live particles and smoke puffs, stored at the front of the arrays
+        self.count = 0
+        # The arrays are a pool of slots: dead entries are overwritten by new ones, the
+        # arrays only grow when every slot is in use and never past max_capacity
+        self.max_capacity = max_capacity
+        self.stats = PoolStats()
+        # How much each explosion makes, full quality until told otherwise
+        self.quality = QUALITY_LEVELS[-1]
+        self._allocate(min(capacity, max_capacity))
+        # Points left out of the last draw for being off screen
+        self.culled = 0
+        # GPU resources, created on the first draw
+        self.program = None
+        self.buffer = None
+        self.geometry = None
+
+    def __len__(self):
+        return self.count
+
+    def _allocate(self, capacity):
+        """ Grow the arrays to hold capacity entries, keeping the live ones """
+        old = None if self.count == 0 else self._fields()
+        self.capacity = capacity
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.change_x = np.zeros(capacity, np.float32)
+        self.change_y = np.zeros(capacity, np.float32)
+        self.alpha = np.zeros(capacity, np.float32)
+        self.scale = np.zeros(capacity, np.float32)
+        self.radius = np.zeros(capacity, np.float32)
+        self.color = np.zeros((capacity, 3), np.uint8)
+        self.smoke = np.zeros(capacity, bool)
+        self.sparkle = np.zeros(capacity, bool)
+        if old is not None:
+            for new_field, old_field in zip(self._fields(), old):
+                new_field[:self.count] = old_field[:self.count]
+
+    def _fields(self):
+        return (self.x, self.y, self.change_x, self.change_y, self.alpha, self.scale,
+                self.radius, self.color, self.smoke, self.sparkle)
+
+    def _reserve(self, amount):
+        """
+        Make room for up to amount new entries and return the slice they go in, which
+        is shorter than amount if max_capacity or the quality level's max_live is reached
+        """
+        stats = self.stats
+        limit = min(self.max_capacity, self.quality.max_live)
+        free = self.capacity - self.count
+        if amount > free and self.capacity < limit:
+            self._allocate(min(max(self.count + amount, self.capacity * 2), limit))
+        granted = max(0, min(amount, limit - self.count, self.capacity - self.count))
+        stats.hits += min(granted, free)
+        stats.misses += granted - min(granted, free)
+        stats.discarded += amount - granted
+        start = self.count
+        self.count += granted
+        stats.in_use = self.count
+        stats.peak = max(stats.peak, self.count)
+        return slice(start, self.count)
+
+    def emit(self, position, count=None):
+        """
+        Starts an explosion: a burst of particles flying out in random directions
+        and a large puff of smoke
+        Parameters:
+            - self (ExplosionEmitter): This class instance
+            - position (tuple): Center of the explosion
+            - count (int): Number of particles, the quality level's particle count if None
+        Returns:
+            None
+        """
+        if count is None:
+            count = self.quality.particle_count
+        x, y = position
+        rng = self.rng
+        new = self._reserve(count)
+        count = new.stop - new.start
         # Set direction/speed
-        speed = random.random() * PARTICLE_SPEED_RANGE + PARTICLE_MIN_SPEED
-        direction = random.randrange(360)
-        self.change_x = math.sin(math.radians(direction)) * speed
-        self.change_y = math.cos(math.radians(direction)) * speed
+        speed = rng.random(count) * PARTICLE_SPEED_RANGE + PARTICLE_MIN_SPEED
+        direction = np.radians(rng.integers(0, 360, count))
+        self.x[new] = x
+        self.y[new] = y
+        self.change_x[new] = np.sin(direction) * speed
+        self.change_y[new] = np.cos(direction) * speed
+        self.alpha[new] = 255
+        self.scale[new] = 1
+        self.radius[new] = PARTICLE_RADIUS
+        # Choose a random color
+        colors = np.array(PARTICLE_COLORS, np.uint8)[:, :3]
+        self.color[new] = colors[rng.integers(0, len(colors), count)]
+        self.smoke[new] = False
+        self.sparkle[new] = False
 
-        # Track original alpha. Used as part of 'sparkle' where we temp set the
-        # alpha back to 255
-        self.my_alpha = 255
+        self.add_smoke(np.array([x], np.float32), np.array([y], np.float32),
+                       SMOKE_EXPLOSION_SIZE * self.quality.smoke_scale)
 
-        # What list do we add smoke particles to?
-        self.my_list = my_list
+    def clear(self):
+        """ Removes every particle and smoke puff, keeping the arrays and GPU buffer for reuse """
+        self.count = 0
+        self.culled = 0
+        self.stats.in_use = 0
+
+    def add_smoke(self, x, y, size):
+        """
+        Adds a puff of smoke at each of the given positions
+        Parameters:
+            - self (ExplosionEmitter): This class instance
+            - x (numpy.ndarray): X positions of the puffs
+            - y (numpy.ndarray): Y positions of the puffs
+            - size (float): Radius of the puffs before scaling
+        Returns:
+            None
+        """
+        new = self._reserve(len(x))
+        self.x[new] = x[:new.stop - new.start]
+        self.y[new] = y[:new.stop - new.start]
+        self.change_x[new] = 0
+        self.change_y[new] = SMOKE_RISE_RATE
+        self.alpha[new] = 255
+        self.scale[new] = SMOKE_START_SCALE
+        self.radius[new] = size
+        self.color[new] = SMOKE_COLOR[:3]
+        self.smoke[new] = True
+        self.sparkle[new] = False
 
     def update(self):
-        """ Update the particle """
-        if self.my_alpha <= PARTICLE_FADE_RATE:
-            # Faded out, remove
-            self.remove_from_sprite_lists()
-        else:
-            # Update
-            self.my_alpha -= PARTICLE_FADE_RATE
-            self.alpha = self.my_alpha
-            self.center_x += self.change_x
-            self.center_y += self.change_y
-            self.change_y -= PARTICLE_GRAVITY
-
-            # Should we sparkle this?
-            if random.random() <= PARTICLE_SPARKLE_CHANCE:
-                self.alpha = 255
-                self.texture = arcade.make_circle_texture(int(self.width),
-                                                          arcade.color.WHITE)
-            else:
-                self.texture = self.normal_texture
-
-            # Leave a smoke particle?
-            if random.random() <= SMOKE_CHANCE:
-                smoke = Smoke(5)
-                smoke.position = self.position
-                self.my_list.append(smoke)
+        """
+        Moves, fades and removes every particle and smoke puff in one pass. Particles
+        fall under gravity, may sparkle for a frame and may leave a trail of smoke
+        Parameters:
+            - self (ExplosionEmitter): This class instance
+        Returns:
+            None
+        """
+        if self.count == 0:
+            return
+        # Remove faded out particles and smoke
+        keep = self.alpha[:self.count] > PARTICLE_FADE_RATE
+        if not keep.all():
+            kept = int(keep.sum())
+            for field in self._fields():
+                field[:kept] = field[:self.count][keep]
+            self.count = kept
+            self.stats.in_use = kept
+
+        live = slice(0, self.count)
+        smoke = self.smoke[live]
+        particle = ~smoke
+        # Update values
+        self.alpha[live] -= np.where(smoke, SMOKE_FADE_RATE, PARTICLE_FADE_RATE)
+        self.x[live] += self.change_x[live]
+        self.y[live] += self.change_y[live]
+        self.change_y[live] -= PARTICLE_GRAVITY * particle
+        self.scale[live] += SMOKE_EXPANSION_RATE * smoke
+
+        # Should we sparkle these?
+        rolls = self.rng.random((2, self.count))
+        self.sparkle[live] = particle & (rolls[0] <= self.quality.sparkle_chance)
+        # Leave a smoke particle? New smoke also gets its first update this frame
+        trail = particle & (rolls[1] <= self.quality.smoke_chance)
+        if trail.any():
+            start = self.count
+            self.add_smoke(self.x[live][trail], self.y[live][trail], SMOKE_TRAIL_SIZE * self.quality.smoke_scale)
+            new = slice(start, self.count)
+            self.alpha[new] -= SMOKE_FADE_RATE
+            self.y[new] += SMOKE_RISE_RATE
+            self.scale[new] += SMOKE_EXPANSION_RATE
+
+    def vertices(self, bounds=None):
+        """
+        The live particles and smoke laid out for the vertex buffer, leaving out any that can't be seen
+        Parameters:
+            - self (ExplosionEmitter): This class instance
+            - bounds (tuple): (left, right, bottom, top) of the visible area, None to keep every point
+        Returns:
+            numpy.ndarray: One VERTEX_DTYPE entry per point to draw
+        """
+        live = slice(0, self.count)
+        self.culled = 0
+        # Points entirely outside the visible area aren't drawn, faded ones are already gone, see update
+        if bounds is not None:
+            left, right, bottom, top = bounds
+            half = self.radius[live] * self.scale[live]
+            x = self.x[live]
+            y = self.y[live]
+            visible = (x + half > left) & (x - half < right) & (y + half > bottom) & (y - half < top)
+            self.culled = self.count - int(visible.sum())
+            if self.culled:
+                live = np.flatnonzero(visible)
+        data = np.empty(self.count - self.culled, VERTEX_DTYPE)
+        data['pos'][:, 0] = self.x[live]
+        data['pos'][:, 1] = self.y[live]
+        data['size'] = self.radius[live] * 2 * self.scale[live]
+        data['color'][:, :3] = self.color[live]
+        data['color'][:, 3] = np.clip(self.alpha[live], 0, 255)
+        # Sparkling particles flash fully opaque white
+        data['color'][self.sparkle[live]] = 255
+        # Index of each point's effect texture in assets.EFFECT_KINDS
+        data['kind'] = self.smoke[live]
+        return data
+
+    def draw(self, bounds=None):
+        """
+        Draws every visible particle and smoke puff with a single draw call
+        Parameters:
+            - self (ExplosionEmitter): This class instance
+            - bounds (tuple): (left, right, bottom, top) of the visible area, None to draw every point
+        Returns:
+            None
+        """
+        self.culled = 0
+        if self.count == 0:
+            return
+        ctx = arcade.get_window().ctx
+        if self.program is None:
+            self.program = ctx.program(vertex_shader=VERTEX_SHADER, fragment_shader=FRAGMENT_SHADER)
+            self.program['effects'] = 0
+            self.program['kinds'] = len(assets.EFFECT_KINDS)
+        data = self.vertices(bounds)
+        if len(data) == 0:
+            return
+        if self.buffer is None or self.buffer.size < data.nbytes:
+            self.buffer = ctx.buffer(reserve=self.capacity * VERTEX_DTYPE.itemsize)
+            self.geometry = ctx.geometry(
+                [BufferDescription(self.buffer, '2f 1f 4f1 1f', ['in_pos', 'in_size', 'in_color', 'in_kind'],
+                                   normalized=['in_color'])],
+                mode=ctx.POINTS,
+            )
+        self.buffer.write(data)
+        assets.manager.get_effect_texture(ctx).use(0)
+        ctx.enable(ctx.BLEND, ctx.PROGRAM_POINT_SIZE)
+        self.geometry.render(self.program, vertices=len(data))
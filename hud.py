@@ -0,0 +1,58 @@
+import arcade
+import pyglet
+
+# Retained text for the HUD and menus. arcade.draw_text lays out its text every
+# time it is called; these arcade.Text objects are laid out once, again only when
+# their string changes, and all of them draw together from one pyglet batch.
+
+
+class TextBatch:
+    def __init__(self):
+        """
+        Class constructor, creates an empty batch of text
+        Parameters:
+            - self (TextBatch): This class instance
+        Returns:
+            None
+        """
+        self.batch = pyglet.graphics.Batch()
+        # Name -> arcade.Text
+        self.texts = {}
+
+    def add(self, name, text, start_x, start_y, color=arcade.color.WHITE, font_size=12, **kwargs):
+        """
+        Lays out a piece of text and adds it to the batch
+        Parameters:
+            - self (TextBatch): This class instance
+            - name (str): Name used to change the text later
+            - text (str): Text to show
+            - start_x (float): X of the text's left edge
+            - start_y (float): Y of the text's baseline
+            - color (tuple): Text color
+            - font_size (float): Text size
+            - kwargs: Any other arcade.Text argument
+        Returns:
+            arcade.Text: The text object
+        """
+        label = arcade.Text(text, start_x, start_y, color, font_size, **kwargs)
+        # arcade.Text has no batch argument in arcade 2.6, so move its pyglet label into ours
+        label._label.batch = self.batch
+        self.texts[name] = label
+        return label
+
+    def set_text(self, name, text):
+        """ Changes a text's string, it is only laid out again if the string is different """
+        label = self.texts[name]
+        if label.text != text:
+            label.text = text
+
+    def set_visible(self, name, visible):
+        """ Shows or hides a text without laying it out again """
+        label = self.texts[name]._label
+        if label.visible != visible:
+            label.visible = visible
+
+    def draw(self):
+        """ Draws every visible text in the batch """
+        with arcade.get_window().ctx.pyglet_rendering():
+            self.batch.draw()
@@ -0,0 +1,347 @@
+import collections
+import math
+import threading
+import time
+
+import engine
+
+# Planner for the level 5 AI. Enemies never move sideways and fall at their own constant
+# change_y, so where each one will be, and when it would reach the ship, is known ahead of
+# time. The planner searches orders to shoot the enemies in over the next few seconds,
+# taking into account how long the ship takes to line up, the time between shots and
+# how long a missile takes to get there, and hands back the best order it found.
+#
+# It works on a Snapshot, an immutable copy of what it needs from one board, so it never
+# looks at the live game. The search is anytime: the first plan it finds is the greedy
+# one (most urgent enemy first) and it keeps improving on it until its budget runs out.
+# Searches always run on a worker thread, never in the game's step. Normally the budget
+# is a number of nodes and the plan for a snapshot is handed over PLAN_DELAY_STEPS steps
+# after it was taken, so the same game always gets the same plans at the same steps and
+# can be replayed. The search runs while those steps are drawn, the game only waits for
+# it if the worker is still not done when the plan is due. In realtime mode the budget is
+# time and the game reads whichever plan finished last, which plans more within the frame
+# but can't be replayed.
+#
+# engine imports this module, so nothing from engine is used until a planner runs.
+
+# Steps of the future a plan looks at, 3 seconds
+LOOKAHEAD_STEPS = 180
+# Most enemies in a snapshot, the lowest ones, so snapshots and searches stay small in dense waves
+MAX_SNAPSHOT_ENEMIES = 24
+# Enemies tried as the next target at each depth of the search, most urgent first. Deeper
+# than this the search only follows the most urgent one
+BRANCHING = (4, 3, 2)
+# Most shots in a plan
+MAX_PLAN_SHOTS = 8
+# Steps between snapshots sent to the planner, one is also sent after every shot
+PLAN_INTERVAL = 6
+# Seconds a search may take in realtime mode, a quarter of a step
+PLAN_TIME_BUDGET = 0.004
+# Nodes a search may visit outside realtime mode, enough that it rarely runs out. A search
+# this size takes a few milliseconds
+PLAN_NODE_BUDGET = 600
+# Steps from a snapshot to the step its plan is handed over on outside realtime mode, 50 ms
+# of frames for the worker to search in
+PLAN_DELAY_STEPS = 3
+# Nodes searched between checks of the clock, which is also when the worker lets the game's thread run
+CLOCK_CHECK_NODES = 32
+# The worker thread stops after this many seconds with nothing to plan, and starts again when needed
+WORKER_IDLE_TIMEOUT = 1.0
+# Furthest the ship can be from an enemy's x and still hit it, missiles overlap enemies up to 23.5 away
+AIM_TOLERANCE = 15
+# Steps the level 5 AI waits between shots, a quarter of a second
+FIRE_DELAY_STEPS = 15
+# Missiles start this far above the ship, and an enemy this low blows the ship up, see GameEngine
+MISSILE_OFFSET = 50
+SHIP_REACH_Y = 50
+
+# What the planner knows about a board on one step:
+#     frame:           step the snapshot was taken on, during the AI's update
+#     ship_x, ship_y:  where the board's ship is
+#     next_fire_frame: first step the AI can fire again
+#     enemies:         (x, y, change_y) of the lowest live enemies
+#     missiles:        (x, y) of the missiles in flight
+Snapshot = collections.namedtuple('Snapshot', 'frame ship_x ship_y next_fire_frame enemies missiles')
+
+# The result of a search, shots are (x, frame) in order: line up with x and fire once frame has come.
+# nodes is how many the search visited and complete whether it looked at everything it wanted to
+Plan = collections.namedtuple('Plan', 'frame shots nodes complete')
+
+
+def snapshot(game, board):
+    """
+    Copies what the planner needs from a board
+    Parameters:
+        - game (GameEngine): The game
+        - board (Board): Board the level 5 AI plays
+    Returns:
+        Snapshot: The copy
+    """
+    # targets keeps enemies lowest first, so the ones that matter most are at the front
+    enemies = tuple((enemy.center_x, enemy.center_y, enemy.change_y)
+                    for enemy in board.targets.entries[:MAX_SNAPSHOT_ENEMIES] if enemy.alive)
+    missiles = tuple((missile.center_x, missile.center_y) for missile in board.missiles if missile.alive)
+    ship = board.ship
+    return Snapshot(game.frame, ship.center_x, ship.center_y, board.next_fire_frame, enemies, missiles)
+
+
+def overlaps(missile_x, enemy_x):
+    """ Whether a missile at missile_x is in line with an enemy at enemy_x """
+    return (missile_x + engine.MISSILE_HIT_BOX[0] < enemy_x + engine.ENEMY_HIT_BOX[1] and
+            enemy_x + engine.ENEMY_HIT_BOX[0] < missile_x + engine.MISSILE_HIT_BOX[1])
+
+
+class _Search:
+    def __init__(self, world, deadline, node_budget, share_gil):
+        """
+        Class constructor, sets up a search over one snapshot
+        Parameters:
+            - self (_Search): This class instance
+            - world (Snapshot): What is known about the board
+            - deadline (float): time.perf_counter() value to stop at, None for no limit
+            - node_budget (int): Most nodes to visit, None for no limit
+            - share_gil (bool): Let other threads run every CLOCK_CHECK_NODES nodes
+        Returns:
+            None
+        """
+        self.world = world
+        self.deadline = deadline
+        self.node_budget = node_budget
+        self.share_gil = share_gil
+        self.nodes = 0
+        self.stopped = False
+        self.horizon = world.frame + LOOKAHEAD_STEPS
+        # (value, shots) of the best plan found so far
+        self.best = None
+
+        # Missiles already in flight each take out the lowest enemy in their way, leave those out
+        doomed = set()
+        for missile_x, missile_y in world.missiles:
+            for index, (x, y, change_y) in enumerate(world.enemies):
+                if (index not in doomed and overlaps(missile_x, x) and
+                        y + engine.ENEMY_HIT_BOX[3] > missile_y + engine.MISSILE_HIT_BOX[2]):
+                    doomed.add(index)
+                    break
+        self.enemies = [enemy for index, enemy in enumerate(world.enemies) if index not in doomed]
+        # Step each enemy would reach the ship on, and the first step it is on screen
+        self.deaths = []
+        self.visible = []
+        for x, y, change_y in self.enemies:
+            if change_y < 0:
+                self.deaths.append(world.frame + math.ceil((y - SHIP_REACH_Y) / -change_y))
+                self.visible.append(world.frame + max(0, math.floor((y - engine.SCREEN_HEIGHT) / -change_y) + 1))
+            else:
+                self.deaths.append(math.inf)
+                self.visible.append(world.frame if y < engine.SCREEN_HEIGHT else math.inf)
+
+    def out_of_budget(self):
+        if self.node_budget is not None and self.nodes >= self.node_budget:
+            return True
+        if self.nodes % CLOCK_CHECK_NODES == 0:
+            if self.share_gil:
+                # Hand the GIL to the game's thread in case it is waiting for it
+                time.sleep(0)
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                return True
+        return False
+
+    def hit_frame(self, index, fire_frame):
+        """ Step a missile fired on fire_frame reaches enemy index on """
+        x, y, change_y = self.enemies[index]
+        y += change_y * (fire_frame - self.world.frame)
+        # Gap between the missile's top and the enemy's bottom, closing by the speeds of both every step
+        gap = (y + engine.ENEMY_HIT_BOX[2]) - (self.world.ship_y + MISSILE_OFFSET + engine.MISSILE_HIT_BOX[3])
+        if gap < 0:
+            return fire_frame
+        return fire_frame + math.floor(gap / (engine.MISSILE_SPEED - change_y)) + 1
+
+    def leaf(self, frame, remaining, shots):
+        """ Scores a finished plan and keeps it if it is the best yet """
+        # Enemies the plan leaves that would reach the ship within the horizon are the worst
+        # thing a plan can do, then fewer shots, then finishing later
+        threats = sum(1 for index in remaining if self.deaths[index] <= self.horizon)
+        value = (-threats, len(shots), -frame)
+        if self.best is None or value > self.best[0]:
+            self.best = (value, shots)
+
+    def expand(self, frame, ship_x, next_fire_frame, remaining, shots):
+        """
+        Tries each of the most urgent enemies as the next target, depth first
+        Parameters:
+            - self (_Search): This class instance
+            - frame (int): Step the last shot was fired on, or the snapshot's
+            - ship_x (float): Where the ship is by then
+            - next_fire_frame (int): First step the ship can fire again
+            - remaining (tuple): Indexes of the enemies not shot yet, most urgent first
+            - shots (tuple): (x, frame) of the shots so far
+        Returns:
+            None
+        """
+        self.nodes += 1
+        if self.stopped or self.out_of_budget():
+            self.stopped = True
+        if (self.stopped or not remaining or len(shots) == MAX_PLAN_SHOTS or frame >= self.horizon or
+                self.deaths[remaining[0]] <= frame + 1):
+            self.leaf(frame, remaining, shots)
+            return
+        depth = len(shots)
+        branching = BRANCHING[depth] if depth < len(BRANCHING) else 1
+        speed = engine.PLAYER_SPEED
+        tried = 0
+        columns = set()
+        for index in remaining:
+            x = self.enemies[index][0]
+            # Only the most urgent enemy in a column can be hit next, the rest are behind it
+            if x in columns:
+                continue
+            columns.add(x)
+            distance = abs(x - ship_x)
+            moves = math.ceil(max(0.0, distance - AIM_TOLERANCE) / speed)
+            new_x = ship_x + math.copysign(moves * speed, x - ship_x)
+            fire_frame = max(frame + max(moves, 1), next_fire_frame, self.visible[index])
+            if self.hit_frame(index, fire_frame) >= self.deaths[index]:
+                # Too late to save the ship from this one
+                continue
+            rest = tuple(other for other in remaining if other != index)
+            self.expand(fire_frame, new_x, fire_frame + FIRE_DELAY_STEPS, rest, shots + ((x, fire_frame),))
+            tried += 1
+            if tried == branching or self.stopped:
+                break
+        if tried == 0:
+            self.leaf(frame, remaining, shots)
+
+    def run(self):
+        world = self.world
+        remaining = tuple(sorted(range(len(self.enemies)), key=self.deaths.__getitem__))
+        self.expand(world.frame, world.ship_x, world.next_fire_frame, remaining, ())
+        return Plan(world.frame, self.best[1], self.nodes, not self.stopped)
+
+
+def search(world, deadline=None, node_budget=None, share_gil=False):
+    """
+    Finds the best order to shoot the enemies of a snapshot in, within a budget
+    Parameters:
+        - world (Snapshot): What is known about the board
+        - deadline (float): time.perf_counter() value to stop at, None for no limit
+        - node_budget (int): Most nodes to visit, None for no limit
+        - share_gil (bool): Let other threads run while searching
+    Returns:
+        Plan: The best plan found
+    """
+    return _Search(world, deadline, node_budget, share_gil).run()
+
+
+class LookaheadPlanner:
+    def __init__(self, realtime=False, time_budget=PLAN_TIME_BUDGET, node_budget=PLAN_NODE_BUDGET,
+                 delay=PLAN_DELAY_STEPS):
+        """
+        Class constructor, creates a planner for one board
+        Parameters:
+            - self (LookaheadPlanner): This class instance
+            - realtime (bool): Give each search a time budget and let the game read whichever plan finished
+              last, otherwise each search gets a node budget and its plan is handed over delay steps after
+              its snapshot, which always gives the same plans on the same steps
+            - time_budget (float): Seconds each realtime search may take
+            - node_budget (int): Nodes each other search may visit
+            - delay (int): Steps from a snapshot to its plan outside realtime mode
+        Returns:
+            None
+        """
+        self.realtime = realtime
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self.delay = delay
+        # Plan handed over last, replaced whole so the game never sees one half written
+        self.plan = None
+        # (due step, Snapshot) of each search asked for and not started, oldest first. Realtime
+        # planning only keeps the newest
+        self.requests = collections.deque()
+        # Due step of the search running now, None while the worker is idle
+        self.searching = None
+        # (due step, Plan) of each search finished and not handed over yet, oldest first
+        self.finished = collections.deque()
+        self.condition = threading.Condition()
+        self.thread = None
+        # Searches run and the seconds the last one took
+        self.searches = 0
+        self.search_time = 0.0
+
+    def submit(self, world):
+        """
+        Asks the worker for a plan for a snapshot. Realtime planning drops any snapshot still waiting,
+        otherwise every snapshot is planned in turn
+        Parameters:
+            - self (LookaheadPlanner): This class instance
+            - world (Snapshot): What is known about the board now
+        Returns:
+            None
+        """
+        with self.condition:
+            if self.realtime:
+                self.requests.clear()
+            self.requests.append((world.frame + self.delay, world))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._work, name='lookahead-planner', daemon=True)
+                self.thread.start()
+            else:
+                self.condition.notify_all()
+
+    def latest(self, frame):
+        """
+        Newest plan for the game to follow. Outside realtime mode this is the plan of the newest
+        snapshot due by frame, waiting for its search only if the worker hasn't finished it yet
+        Parameters:
+            - self (LookaheadPlanner): This class instance
+            - frame (int): Step the game is on
+        Returns:
+            Plan: The plan, None before the first one
+        """
+        if self.realtime:
+            return self.plan
+        with self.condition:
+            while True:
+                finished = self.finished
+                while finished and finished[0][0] <= frame:
+                    self.plan = finished.popleft()[1]
+                if not ((self.requests and self.requests[0][0] <= frame) or
+                        (self.searching is not None and self.searching <= frame)):
+                    return self.plan
+                self.condition.wait()
+
+    def pending(self):
+        """
+        Waits for every search asked for to finish, then gives the plans not handed over yet
+        Parameters:
+            - self (LookaheadPlanner): This class instance
+        Returns:
+            list: (due step, Plan) of each, oldest first
+        """
+        with self.condition:
+            while self.requests or self.searching is not None:
+                self.condition.wait()
+            return list(self.finished)
+
+    def _work(self):
+        """ Worker thread, plans each snapshot asked for until none come for WORKER_IDLE_TIMEOUT """
+        while True:
+            with self.condition:
+                if not self.requests:
+                    self.condition.wait(WORKER_IDLE_TIMEOUT)
+                if not self.requests:
+                    self.thread = None
+                    return
+                self.searching, world = self.requests.popleft()
+            start = time.perf_counter()
+            if self.realtime:
+                plan = search(world, start + self.time_budget, None, True)
+            else:
+                plan = search(world, None, self.node_budget, True)
+            with self.condition:
+                self.search_time = time.perf_counter() - start
+                self.searches += 1
+                if self.realtime:
+                    self.plan = plan
+                else:
+                    self.finished.append((self.searching, plan))
+                self.searching = None
+                self.condition.notify_all()
@@ -0,0 +1,103 @@
+# Object pools. Dead objects go back on a free list and are reset and handed out
+# again instead of constructing new ones, which for arcade sprites means skipping
+# Sprite.__init__ and its texture lookup on every shot and every wave.
+
+
+class PoolStats:
+    """ Counters describing how well a pool is being reused """
+    def __init__(self):
+        # Requests served from the free list
+        self.hits = 0
+        # Requests that had to construct a new object
+        self.misses = 0
+        # Objects dropped on release because the free list was full
+        self.discarded = 0
+        # Objects handed out and not yet released
+        self.in_use = 0
+        # Highest in_use has been
+        self.peak = 0
+
+    def acquired(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.in_use += 1
+        if self.in_use > self.peak:
+            self.peak = self.in_use
+
+    def as_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'discarded': self.discarded,
+            'in_use': self.in_use,
+            'peak': self.peak,
+        }
+
+    def __repr__(self):
+        return 'PoolStats(' + ', '.join(f'{key}={value}' for key, value in self.as_dict().items()) + ')'
+
+
+class Pool:
+    def __init__(self, factory, cap=256):
+        """
+        Class constructor, creates an empty pool
+        Parameters:
+            - self (Pool): This class instance
+            - factory (function): Builds a new object from the arguments given to acquire
+            - cap (int): Most free objects kept for reuse, extras are left to the garbage collector
+        Returns:
+            None
+        """
+        self.factory = factory
+        self.cap = cap
+        self.free = []
+        self.stats = PoolStats()
+
+    def acquire(self, *args):
+        """
+        Hands out a free object reset with args, or a new one if none are free. Pooled
+        objects must have a reset method taking the same arguments as the factory
+        Parameters:
+            - self (Pool): This class instance
+            - args: Arguments for the factory or reset
+        Returns:
+            The object
+        """
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            self.stats.acquired(True)
+        else:
+            obj = self.factory(*args)
+            self.stats.acquired(False)
+        return obj
+
+    def release(self, obj):
+        """
+        Returns an object to the pool once it is no longer used
+        Parameters:
+            - self (Pool): This class instance
+            - obj: The object, must have come from acquire
+        Returns:
+            None
+        """
+        self.stats.in_use -= 1
+        if len(self.free) < self.cap:
+            self.free.append(obj)
+        else:
+            self.stats.discarded += 1
+
+    def prewarm(self, count, *args):
+        """
+        Fills the free list up front so the first count requests are hits
+        Parameters:
+            - self (Pool): This class instance
+            - count (int): Number of free objects wanted, limited by cap
+            - args: Arguments for the factory
+        Returns:
+            None
+        """
+        while len(self.free) < min(count, self.cap):
+            self.free.append(self.factory(*args))
@@ -0,0 +1,101 @@
+import time
+
+import numpy as np
+
+# Per-phase frame timing. Code being measured calls lap(name) after each phase, which
+# adds the time since the previous lap to that phase in the current frame. Frames are
+# kept in a fixed-size ring buffer, so the profiler's memory never grows.
+
+# Phases of a frame, in the order they run
+PHASES = ('player', 'ai', 'spawn', 'collision', 'movement', 'events', 'sync', 'explosions',
+          'draw_scene', 'draw_explosions', 'draw_hud')
+
+# Percentiles reported for each phase
+PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler:
+    def __init__(self, capacity=600, phases=PHASES):
+        """
+        Class constructor, creates an empty ring buffer of frame samples
+        Parameters:
+            - self (FrameProfiler): This class instance
+            - capacity (int): Number of most recent frames kept
+            - phases (tuple): Names of the phases that make up a frame
+        Returns:
+            None
+        """
+        self.phases = tuple(phases)
+        self.columns = {name: index for index, name in enumerate(self.phases)}
+        # Seconds spent in each phase, one row per frame, last column is the frame total
+        self.samples = np.zeros((capacity, len(self.phases) + 1))
+        self.capacity = capacity
+        # Row of the frame being measured, and number of rows holding finished frames
+        self.index = 0
+        self.filled = 0
+        self.last = time.perf_counter()
+        self.frame_start = self.last
+
+    def begin_frame(self):
+        """ Starts measuring a new frame, clearing the oldest one if the buffer is full """
+        self.samples[self.index] = 0
+        self.start()
+        self.frame_start = self.last
+
+    def start(self):
+        """ Restarts the lap clock, time since the last lap is not counted towards any phase """
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        """ Adds the time since the previous lap to phase in the current frame """
+        now = time.perf_counter()
+        self.samples[self.index, self.columns[phase]] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        """ Finishes the current frame, its total is the sum of its phases """
+        row = self.samples[self.index]
+        row[-1] = row[:-1].sum()
+        self.index = (self.index + 1) % self.capacity
+        self.filled = min(self.filled + 1, self.capacity)
+
+    def frames(self):
+        """ Finished frames in the buffer, oldest first, in seconds """
+        if self.filled < self.capacity:
+            return self.samples[:self.filled]
+        return np.roll(self.samples, -self.index, axis=0)
+
+    def percentiles(self):
+        """
+        Percentiles of every phase and of the frame total over the buffered frames
+        Parameters:
+            - self (FrameProfiler): This class instance
+        Returns:
+            dict: Phase name (and 'total') to {percentile: milliseconds}
+        """
+        frames = self.frames()
+        names = self.phases + ('total',)
+        if len(frames) == 0:
+            return {name: {p: 0.0 for p in PERCENTILES} for name in names}
+        values = np.percentile(frames, PERCENTILES, axis=0) * 1000
+        return {name: {p: float(values[i, column]) for i, p in enumerate(PERCENTILES)}
+                for column, name in enumerate(names)}
+
+    def summary_lines(self):
+        """ One line of text per phase with its p50/p95/p99 in milliseconds """
+        lines = [f'{"phase":<16}' + ''.join(f'{"p" + str(p):>8}' for p in PERCENTILES)]
+        for name, values in self.percentiles().items():
+            lines.append(f'{name:<16}' + ''.join(f'{values[p]:8.2f}' for p in PERCENTILES))
+        return lines
+
+    def dump(self, path):
+        """
+        Writes the buffered frames to a CSV file, one row per frame in milliseconds
+        Parameters:
+            - self (FrameProfiler): This class instance
+            - path (str): File to write
+        Returns:
+            None
+        """
+        header = ','.join(self.phases + ('total',))
+        np.savetxt(path, self.frames() * 1000, fmt='%.4f', delimiter=',', header=header, comments='')
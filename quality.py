@@ -0,0 +1,97 @@
+import collections
+
+# Adaptive visual quality. The controller watches recent frame times against a
+# budget and moves between quality levels, 0 being the cheapest and the last the
+# full quality the game was made with. It only decides the level; what a level
+# means is up to whatever draws, here the explosions in explosion.QUALITY_LEVELS.
+# Nothing it changes feeds back into the game simulation, so games play out the same.
+
+# Frames looked at for each decision, about half a second at 60 FPS. Their median is
+# used, so a single hitch such as a view loading doesn't count as the game running slow
+QUALITY_WINDOW = 30
+# Quality drops a level when the median frame takes this much longer than the budget
+DEGRADE_RATIO = 1.2
+# and is raised a level after this many windows in a row within this ratio of the budget
+UPGRADE_RATIO = 1.05
+UPGRADE_WINDOWS = 4
+# Raising a level that had to be dropped again straight away waits this many times
+# longer before the next try, up to MAX_UPGRADE_WINDOWS
+UPGRADE_BACKOFF = 2
+MAX_UPGRADE_WINDOWS = 64
+
+
+class QualityController:
+    def __init__(self, levels, budget, level=None, window=QUALITY_WINDOW):
+        """
+        Class constructor, starts at the given level and adapts from there
+        Parameters:
+            - self (QualityController): This class instance
+            - levels (int): Number of quality levels
+            - budget (float): Seconds a frame should take at most
+            - level (int): Level to start at, the highest if None
+            - window (int): Frames looked at for each decision
+        Returns:
+            None
+        """
+        self.levels = levels
+        self.budget = budget
+        self.window = window
+        self.level = levels - 1 if level is None else level
+        # Frame times since the last decision
+        self.samples = collections.deque(maxlen=window)
+        # Calm windows in a row, and how many are needed before raising the level
+        self.calm = 0
+        self.upgrade_windows = UPGRADE_WINDOWS
+        # Whether the last change raised the level, to notice when it had to be dropped right after
+        self.just_raised = False
+        # False keeps the level where it is, such as when it was chosen on the command line
+        self.adaptive = True
+        # Number of times the level changed
+        self.changes = 0
+
+    @property
+    def is_full(self):
+        return self.level == self.levels - 1
+
+    def add_frame(self, seconds):
+        """
+        Records how long a frame took, and changes the level once a window of frames has been seen
+        Parameters:
+            - self (QualityController): This class instance
+            - seconds (float): Time the frame took
+        Returns:
+            bool: Whether the level changed
+        """
+        if not self.adaptive:
+            return False
+        self.samples.append(seconds)
+        if len(self.samples) < self.window:
+            return False
+        median = sorted(self.samples)[len(self.samples) // 2]
+        self.samples.clear()
+        if median > self.budget * DEGRADE_RATIO:
+            self.calm = 0
+            if self.just_raised:
+                # The higher level was too much, wait longer before trying it again
+                self.upgrade_windows = min(self.upgrade_windows * UPGRADE_BACKOFF, MAX_UPGRADE_WINDOWS)
+            self.just_raised = False
+            return self.set_level(self.level - 1)
+        self.just_raised = False
+        if median > self.budget * UPGRADE_RATIO:
+            self.calm = 0
+            return False
+        self.calm += 1
+        if self.calm < self.upgrade_windows or self.is_full:
+            return False
+        self.calm = 0
+        self.just_raised = True
+        return self.set_level(self.level + 1)
+
+    def set_level(self, level):
+        """ Moves to a level, clamped to the ones there are, returns whether it changed """
+        level = max(0, min(level, self.levels - 1))
+        if level == self.level:
+            return False
+        self.level = level
+        self.changes += 1
+        return True
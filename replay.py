@@ -0,0 +1,340 @@
+import argparse
+import io
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+import engine
+
+# Replays of HumanVsAi games. The engine is deterministic, so a game is fully described
+# by its seed, its settings and the player's inputs with the frame they happened on.
+# Replay files are a small header followed by records:
+#     input:    type, frame delta (varint), action << 1 | pressed
+#     keyframe: type, frame delta (varint), length (varint), engine state
+#     end:      type, frame delta (varint)
+# Keyframes are only there for seeking, playing from the start never needs them. The
+# engine state is the arrays GameEngine.to_arrays names, zlib-compressed together as
+#     count (varint), then for each: name length (varint), name, array in .npy format
+# and read back without pickle, so opening a replay never runs code from it.
+
+MAGIC = b'HVAR'
+# Bumped whenever the records or the arrays of keyframes change
+VERSION = 11
+# magic, version, human playing, seed, number of AI boards, then one byte per AI board
+# with its level (0 if it ramps with the waves)
+HEADER = struct.Struct('<4sBBQB')
+
+RECORD_INPUT = 1
+RECORD_KEYFRAME = 2
+RECORD_END = 3
+
+# Frames between keyframes, one a minute at 60 steps per second
+KEYFRAME_INTERVAL = 60 * engine.STEP_RATE
+
+
+def write_varint(buffer, value):
+    """ Appends an unsigned integer to buffer using 7 bits per byte """
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, offset):
+    """ Reads an unsigned integer written by write_varint, returns (value, next offset) """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def snapshot(game):
+    """ Compressed copy of an engine's whole state """
+    arrays = game.to_arrays()
+    data = bytearray()
+    write_varint(data, len(arrays))
+    for name, array in arrays.items():
+        name = name.encode()
+        write_varint(data, len(name))
+        data.extend(name)
+        buffer = io.BytesIO()
+        np.save(buffer, array, allow_pickle=False)
+        data.extend(buffer.getbuffer())
+    return zlib.compress(data, 9)
+
+
+def restore(data):
+    """ Engine rebuilt from a snapshot """
+    buffer = io.BytesIO(zlib.decompress(data))
+    data = buffer.getbuffer()
+    count, offset = read_varint(data, 0)
+    arrays = {}
+    for _ in range(count):
+        length, offset = read_varint(data, offset)
+        name = bytes(data[offset:offset + length]).decode()
+        buffer.seek(offset + length)
+        arrays[name] = np.load(buffer, allow_pickle=False)
+        offset = buffer.tell()
+    return engine.GameEngine.from_arrays(arrays)
+
+
+class ReplayRecorder:
+    def __init__(self, game, keyframe_interval=KEYFRAME_INTERVAL):
+        """
+        Class constructor, starts recording a game that has not been stepped yet
+        Parameters:
+            - self (ReplayRecorder): This class instance
+            - game (GameEngine): Game to record, its inputs and steps are reported to this recorder
+            - keyframe_interval (int): Frames between keyframes, 0 for none
+        Returns:
+            None
+        """
+        self.keyframe_interval = keyframe_interval
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, game.human, game.seed, len(game.ai_levels)))
+        self.data.extend(level or 0 for level in game.ai_levels)
+        # Frame of the last record written, record frames are stored relative to it
+        self.frame = 0
+        self.finished = False
+        game.recorder = self
+
+    def _start_record(self, record_type, frame):
+        self.data.append(record_type)
+        write_varint(self.data, frame - self.frame)
+        self.frame = frame
+
+    def input(self, frame, action, pressed):
+        """ Records a player input that applies before the step of frame """
+        self._start_record(RECORD_INPUT, frame)
+        self.data.append(action << 1 | pressed)
+
+    def after_step(self, game):
+        """ Called by the engine after every step, saves a keyframe when one is due """
+        if self.keyframe_interval and game.frame % self.keyframe_interval == 0:
+            state = snapshot(game)
+            self._start_record(RECORD_KEYFRAME, game.frame)
+            write_varint(self.data, len(state))
+            self.data.extend(state)
+
+    def finish(self, game):
+        """
+        Ends the recording
+        Parameters:
+            - self (ReplayRecorder): This class instance
+            - game (GameEngine): The recorded game
+        Returns:
+            bytes: The replay
+        """
+        if not self.finished:
+            self._start_record(RECORD_END, game.frame)
+            self.finished = True
+            game.recorder = None
+        return bytes(self.data)
+
+    def save(self, game, path):
+        with open(path, 'wb') as file:
+            file.write(self.finish(game))
+
+
+class Replay:
+    def __init__(self, data):
+        """
+        Class constructor, parses a replay
+        Parameters:
+            - self (Replay): This class instance
+            - data (bytes): Replay made by ReplayRecorder
+        Returns:
+            None
+        """
+        magic, version, human, seed, ai_boards = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not a HumanVsAi replay, or made by a different version')
+        self.human = bool(human)
+        self.seed = seed
+        self.ai_levels = [level or None for level in data[HEADER.size:HEADER.size + ai_boards]]
+        # (frame, action, pressed) in order
+        self.inputs = []
+        # (frame, snapshot) in order
+        self.keyframes = []
+        # Frame the recording stopped on, None if it was cut short
+        self.end_frame = None
+
+        offset = HEADER.size + ai_boards
+        frame = 0
+        while offset < len(data):
+            record_type = data[offset]
+            delta, offset = read_varint(data, offset + 1)
+            frame += delta
+            if record_type == RECORD_INPUT:
+                code = data[offset]
+                offset += 1
+                self.inputs.append((frame, code >> 1, bool(code & 1)))
+            elif record_type == RECORD_KEYFRAME:
+                length, offset = read_varint(data, offset)
+                self.keyframes.append((frame, bytes(data[offset:offset + length])))
+                offset += length
+            elif record_type == RECORD_END:
+                self.end_frame = frame
+            else:
+                raise ValueError(f'Unknown replay record type {record_type}')
+        # Next input to apply
+        self.cursor = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            return cls(file.read())
+
+    def new_game(self):
+        """ Engine at frame 0 with the recorded settings, and the input cursor back at the start """
+        self.cursor = 0
+        return engine.GameEngine(self.seed, human=self.human, ai_levels=self.ai_levels)
+
+    def apply_inputs(self, game):
+        """
+        Applies every recorded input due before the game's next step, call before each step
+        Parameters:
+            - self (Replay): This class instance
+            - game (GameEngine): Game being played back
+        Returns:
+            None
+        """
+        inputs = self.inputs
+        while self.cursor < len(inputs) and inputs[self.cursor][0] <= game.frame:
+            frame, action, pressed = inputs[self.cursor]
+            if pressed:
+                game.press(action)
+            else:
+                game.release(action)
+            self.cursor += 1
+
+    def seek(self, frame):
+        """
+        Gets the game as it was at a frame, starting from the closest keyframe before it
+        Parameters:
+            - self (Replay): This class instance
+            - frame (int): Frame to stop at
+        Returns:
+            GameEngine: The game, ready to keep playing with apply_inputs and step
+        """
+        game = self.new_game()
+        for keyframe, state in self.keyframes:
+            if keyframe > frame:
+                break
+            game = restore(state)
+        # Skip inputs from before the keyframe, they are already part of its state
+        while self.cursor < len(self.inputs) and self.inputs[self.cursor][0] < game.frame:
+            self.cursor += 1
+        while game.frame < frame and not game.finished:
+            self.apply_inputs(game)
+            game.step()
+        return game
+
+    def play(self, game=None):
+        """
+        Plays the rest of the game as fast as possible without drawing anything
+        Parameters:
+            - self (Replay): This class instance
+            - game (GameEngine): Game to continue, such as one from seek, a new one if None
+        Returns:
+            GameEngine: The finished game
+        """
+        if game is None:
+            game = self.new_game()
+        while not game.finished:
+            self.apply_inputs(game)
+            game.step()
+        return game
+
+
+def state_key(game):
+    """ Everything about a game's state that shows whether two runs of it have drifted apart """
+    return (game.frame, game.score, game.wave, game.game_over, tuple(board.ship.center_x for board in game.boards),
+            tuple(enemy.position for enemy in game.enemies), tuple(missile.position for missile in game.missiles))
+
+
+def check_keyframes(replay):
+    """
+    Seeks to every keyframe of a replay and plays on from there, checking each step matches playing
+    the replay from the start
+    Parameters:
+        - replay (Replay): The replay
+    Returns:
+        list: Frame of each keyframe the game drifted from, empty if seeking works
+    """
+    # State after each call to step, the last call finishes the game without moving it on a frame
+    game = replay.new_game()
+    expected = []
+    while not game.finished:
+        replay.apply_inputs(game)
+        game.step()
+        expected.append(state_key(game))
+    drifted = []
+    for frame, _ in replay.keyframes:
+        game = replay.seek(frame)
+        for key in expected[frame:]:
+            replay.apply_inputs(game)
+            game.step()
+            if state_key(game) != key:
+                drifted.append(frame)
+                break
+    return drifted
+
+
+def record_ai_game(seed, ai_levels, keyframe_interval):
+    """ Plays a game of AI boards without a window and returns its replay """
+    game = engine.GameEngine(seed, human=False, ai_levels=ai_levels)
+    recorder = ReplayRecorder(game, keyframe_interval)
+    while game.step():
+        pass
+    return Replay(recorder.finish(game))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fast-forward a HumanVsAi replay without drawing it')
+    parser.add_argument('replay', nargs='?', help='replay file')
+    parser.add_argument('--seek', type=int, help='print the state at this frame instead of playing to the end')
+    parser.add_argument('--check', action='store_true',
+                        help='seek to every keyframe and check the game plays on the same as from the start')
+    parser.add_argument('--check-ai', type=int, nargs='+', metavar='LEVEL',
+                        help='check seeking on a new game of AI boards at these levels instead of a replay file, '
+                             '0 ramps a board with the waves')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the --check-ai game')
+    parser.add_argument('--keyframe-interval', type=int, default=97, metavar='FRAMES',
+                        help='frames between the --check-ai game\'s keyframes, one that doesn\'t divide a wave '
+                             'lands them on every kind of step')
+    args = parser.parse_args()
+
+    if args.check_ai:
+        replay = record_ai_game(args.seed, [level or None for level in args.check_ai], args.keyframe_interval)
+    elif args.replay:
+        replay = Replay.load(args.replay)
+    else:
+        parser.error('give a replay file or --check-ai')
+    if args.check or args.check_ai:
+        drifted = check_keyframes(replay)
+        print(f'{len(replay.keyframes)} keyframes, {len(drifted)} drifted' +
+              (f': frames {", ".join(map(str, drifted))}' if drifted else ''))
+        sys.exit(1 if drifted else 0)
+    print(f'seed={replay.seed} ai_levels={[level or "by wave" for level in replay.ai_levels]} inputs={len(replay.inputs)} '
+          f'keyframes={len(replay.keyframes)} end_frame={replay.end_frame}')
+    start = time.perf_counter()
+    if args.seek is not None:
+        game = replay.seek(args.seek)
+    else:
+        game = replay.play()
+    seconds = time.perf_counter() - start
+    print(f'frame={game.frame} wave={game.wave} score={game.score} game_over={game.game_over} '
+          f'enemies={len(game.enemies)} missiles={len(game.missiles)}')
+    print(f'{game.frame} frames in {seconds:.2f}s ({game.frame / max(seconds, 1e-9):.0f} frames/s)')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import bisect
+import heapq
+import math
+import weakref
+
+import numpy as np
+
+# Target lookups for the AI players. Every enemy on a board falls at the same speed,
+# so their order by height never changes once they have spawned. Each board keeps its
+# live enemies in that order, updated only when an enemy spawns or dies, instead of
+# scanning and sorting every enemy every frame. Enemies never move sideways, so the
+# ones not shot at yet are also kept sorted by x for alignment checks.
+
+
+class BoardTargetIndex:
+    def __init__(self):
+        """
+        Class constructor, creates an empty index for one board
+        Parameters:
+            - self (BoardTargetIndex): This class instance
+        Returns:
+            None
+        """
+        # (height key, spawn number) of each live enemy, sorted, and the enemies in the same order
+        self.keys = []
+        self.entries = []
+        # Enemy -> its key, so it can be found again when it dies
+        self.key_of = {}
+        # Spawn counter, breaks ties between enemies at the same height in spawn order
+        self.count = 0
+        # Enemies the AI has fired at. Weak, so dead enemies drop out once nothing refers
+        # to them and the set never grows past the enemies still in play
+        self.shot = weakref.WeakSet()
+        # Heap of (key, enemy) for enemies not shot at, shot and dead ones are skipped when popped
+        self.unshot_heap = []
+        # (x, spawn number) of each live enemy not shot at, sorted, and the enemies in the same order
+        self.unshot_keys = []
+        self.unshot_entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def to_arrays(self, slot_of):
+        """
+        The index as named arrays for keyframes, every enemy in it given as its slot
+        Parameters:
+            - self (BoardTargetIndex): This class instance
+            - slot_of (function): Slot of an enemy
+        Returns:
+            dict: Name -> numpy.ndarray, see from_arrays
+        """
+        heap_keys = [entry_key for entry_key, _ in self.unshot_heap]
+        return {
+            'key': np.array([key for key, _ in self.keys], np.float64),
+            'number': np.array([number for _, number in self.keys], np.int64),
+            'entries': np.array([slot_of(enemy) for enemy in self.entries], np.int64),
+            'count': np.array(self.count),
+            'shot': np.array([slot_of(enemy) for enemy in self.shot], np.int64),
+            'heap_key': np.array([key for key, _ in heap_keys], np.float64),
+            'heap_number': np.array([number for _, number in heap_keys], np.int64),
+            'heap_entries': np.array([slot_of(enemy) for _, enemy in self.unshot_heap], np.int64),
+            'unshot_x': np.array([x for x, _ in self.unshot_keys], np.float64),
+            'unshot_number': np.array([number for _, number in self.unshot_keys], np.int64),
+            'unshot_entries': np.array([slot_of(enemy) for enemy in self.unshot_entries], np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, enemy_at):
+        """
+        Rebuilds an index from to_arrays
+        Parameters:
+            - arrays (dict): Name -> numpy.ndarray, as made by to_arrays
+            - enemy_at (function): Enemy in a slot, the same object every time for the same slot
+        Returns:
+            BoardTargetIndex: The index
+        """
+        index = cls()
+        index.keys = list(zip(arrays['key'].tolist(), arrays['number'].tolist()))
+        index.entries = [enemy_at(slot) for slot in arrays['entries'].tolist()]
+        index.key_of = dict(zip(index.entries, index.keys))
+        index.count = int(arrays['count'])
+        index.shot = weakref.WeakSet(enemy_at(slot) for slot in arrays['shot'].tolist())
+        index.unshot_heap = [(entry_key, enemy_at(slot)) for entry_key, slot in
+                             zip(zip(arrays['heap_key'].tolist(), arrays['heap_number'].tolist()),
+                                 arrays['heap_entries'].tolist())]
+        index.unshot_keys = list(zip(arrays['unshot_x'].tolist(), arrays['unshot_number'].tolist()))
+        index.unshot_entries = [enemy_at(slot) for slot in arrays['unshot_entries'].tolist()]
+        return index
+
+    def add(self, enemy, key):
+        """
+        Adds a newly spawned enemy
+        Parameters:
+            - self (BoardTargetIndex): This class instance
+            - enemy (Enemy): The enemy
+            - key (float): Height the enemy would be at on frame 0, orders enemies by height at any time
+        Returns:
+            None
+        """
+        entry_key = (key, self.count)
+        self.count += 1
+        index = bisect.bisect_right(self.keys, entry_key)
+        self.keys.insert(index, entry_key)
+        self.entries.insert(index, enemy)
+        self.key_of[enemy] = entry_key
+
+        heapq.heappush(self.unshot_heap, (entry_key, enemy))
+        x_key = (enemy.center_x, entry_key[1])
+        index = bisect.bisect_right(self.unshot_keys, x_key)
+        self.unshot_keys.insert(index, x_key)
+        self.unshot_entries.insert(index, enemy)
+
+    def remove(self, enemy):
+        """ Drops a dead enemy, it stays in shot for as long as something else refers to it """
+        entry_key = self.key_of.pop(enemy, None)
+        if entry_key is None:
+            return
+        index = bisect.bisect_left(self.keys, entry_key)
+        del self.keys[index]
+        del self.entries[index]
+        if enemy not in self.shot:
+            self._remove_unshot(enemy, entry_key)
+
+    def _remove_unshot(self, enemy, entry_key):
+        index = bisect.bisect_left(self.unshot_keys, (enemy.center_x, entry_key[1]))
+        del self.unshot_keys[index]
+        del self.unshot_entries[index]
+        # Stale heap entries are normally dropped by lowest_unshot, rebuild the heap if
+        # nobody is asking so it doesn't keep growing
+        if len(self.unshot_heap) > 2 * len(self.unshot_entries) + 32:
+            self.unshot_heap = [(self.key_of[e], e) for e in self.unshot_entries]
+            heapq.heapify(self.unshot_heap)
+
+    def is_shot(self, enemy):
+        return enemy in self.shot
+
+    def mark_shot(self, enemy):
+        if enemy in self.shot:
+            return
+        self.shot.add(enemy)
+        entry_key = self.key_of.get(enemy)
+        if entry_key is not None:
+            self._remove_unshot(enemy, entry_key)
+
+    def lowest_target(self, max_y):
+        """
+        Picks the level 3 AI's target: the last enemy not yet shot at in the lowest row, or the
+        row's first enemy if they have all been shot at
+        Parameters:
+            - self (BoardTargetIndex): This class instance
+            - max_y (float): Enemies at or above this height aren't visible yet
+        Returns:
+            Enemy: The target, None if no enemy is visible
+        """
+        entries = self.entries
+        if not entries or entries[0].center_y >= max_y:
+            return None
+        row_end = bisect.bisect_right(self.keys, (self.keys[0][0], math.inf))
+        for index in range(row_end - 1, 0, -1):
+            if entries[index] not in self.shot:
+                return entries[index]
+        return entries[0]
+
+    def lowest_unshot(self, max_y):
+        """
+        Finds the lowest visible enemy that hasn't been shot at, ties go to the first spawned
+        Parameters:
+            - self (BoardTargetIndex): This class instance
+            - max_y (float): Enemies at or above this height aren't visible yet
+        Returns:
+            Enemy: The enemy, None if there isn't one
+        """
+        heap = self.unshot_heap
+        # Drop enemies that have been shot at or died since they were pushed
+        while heap and (heap[0][1] in self.shot or heap[0][1] not in self.key_of):
+            heapq.heappop(heap)
+        if heap and heap[0][1].center_y < max_y:
+            return heap[0][1]
+        return None
+
+    def aligned_unshot(self, x, tolerance, max_y):
+        """
+        Finds the visible enemies not shot at yet that are within tolerance of x
+        Parameters:
+            - self (BoardTargetIndex): This class instance
+            - x (float): X to look around, such as the AI player's
+            - tolerance (float): Furthest an enemy can be from x
+            - max_y (float): Enemies at or above this height aren't visible yet
+        Returns:
+            list: The enemies, lowest first
+        """
+        start = bisect.bisect_left(self.unshot_keys, (x - tolerance, -math.inf))
+        end = bisect.bisect_right(self.unshot_keys, (x + tolerance, math.inf))
+        aligned = [enemy for enemy in self.unshot_entries[start:end] if enemy.center_y < max_y]
+        aligned.sort(key=self.key_of.__getitem__)
+        return aligned
@@ -0,0 +1,214 @@
+import argparse
+import glob
+import io
+import os
+import threading
+import time
+
+import numpy as np
+
+# Gameplay telemetry for balancing. The engine tells a TelemetryLog about every shot, kill,
+# missed shot and ship lost while it steps. Each event is one row of a fixed-size ring
+# buffer, so recording one is a tuple assignment and the log's memory never grows. A
+# background thread writes what has been recorded to the log folder every so often, as
+# numbered .npz chunks holding one array per column. Chunks are only ever added, each is
+# written to a temporary file and renamed into place, so a reader never sees half of one.
+# read() and summary() load them back.
+#
+# When the thread falls so far behind that the ring buffer fills up, new events are
+# dropped and counted rather than waiting for it.
+
+# Kinds of event
+SHOT = 1
+KILL = 2
+MISS = 3
+DEATH = 4
+KIND_NAMES = {SHOT: 'shot', KILL: 'kill', MISS: 'miss', DEATH: 'death'}
+
+# Columns of an event:
+#     game:     seed of the game it happened in
+#     frame:    step of the game it happened on
+#     kind:     SHOT, KILL, MISS or DEATH, a death is the board's ship blowing up
+#     board:    board it happened on, PLAYER_BOARD is the human's
+#     wave:     wave the game was on
+#     ai_level: level of the AI playing the board then, 0 on the human's board
+#     value:    seconds from the enemy coming into play to the kill for KILL, 0 otherwise
+EVENT_DTYPE = np.dtype([('game', np.int64), ('frame', np.uint32), ('kind', np.uint8), ('board', np.uint8),
+                        ('wave', np.uint8), ('ai_level', np.uint8), ('value', np.float32)])
+
+# Events the ring buffer holds, 20 bytes each
+DEFAULT_CAPACITY = 1 << 16
+# Seconds between the thread's writes, and how full the buffer gets before it writes early
+FLUSH_INTERVAL = 2.0
+FLUSH_FRACTION = 0.5
+
+
+class TelemetryLog:
+    def __init__(self, directory, capacity=DEFAULT_CAPACITY, flush_interval=FLUSH_INTERVAL):
+        """
+        Class constructor, creates the log folder if needed and starts the thread writing to it
+        Parameters:
+            - self (TelemetryLog): This class instance
+            - directory (str): Folder the chunks go in, chunks already there are kept
+            - capacity (int): Events the ring buffer holds
+            - flush_interval (float): Seconds between writes
+        Returns:
+            None
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.buffer = np.zeros(capacity, EVENT_DTYPE)
+        self.capacity = capacity
+        # Events recorded and events written so far. Only the game's thread moves head and only
+        # the writing thread moves tail, the rows between them are waiting to be written
+        self.head = 0
+        self.tail = 0
+        # Events lost to a full buffer
+        self.dropped = 0
+        # Chunks this log has written, their names start with when and by which process it was opened
+        self.chunks = 0
+        self.prefix = f'chunk_{time.strftime("%Y%m%d_%H%M%S")}_{os.getpid()}'
+        self.flush_interval = flush_interval
+        self.flush_size = max(1, int(capacity * FLUSH_FRACTION))
+        self.wake = threading.Event()
+        self.closing = False
+        self.thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+        self.thread.start()
+
+    def record(self, game, kind, board, value=0.0):
+        """
+        Adds an event to the ring buffer, or counts it as dropped if the buffer is full
+        Parameters:
+            - self (TelemetryLog): This class instance
+            - game (GameEngine): Game it happened in
+            - kind (int): SHOT, KILL, MISS or DEATH
+            - board (int): Board it happened on
+            - value (float): Time to kill for KILL
+        Returns:
+            None
+        """
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.dropped += 1
+            return
+        level = game.current_ai_level(board) if board else 0
+        self.buffer[head % self.capacity] = (game.seed, game.frame, kind, board, game.wave, level or 0, value)
+        self.head = head + 1
+        if head + 1 - self.tail == self.flush_size:
+            self.wake.set()
+
+    def shot(self, game, board):
+        self.record(game, SHOT, board)
+
+    def kill(self, game, board, seconds):
+        self.record(game, KILL, board, seconds)
+
+    def miss(self, game, board):
+        self.record(game, MISS, board)
+
+    def death(self, game, board):
+        self.record(game, DEATH, board)
+
+    def _run(self):
+        while not self.closing:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        """ Writes every event waiting in the buffer to a new chunk, returns how many """
+        head, tail = self.head, self.tail
+        if head == tail:
+            return 0
+        start, end = tail % self.capacity, head % self.capacity
+        if start < end:
+            events = self.buffer[start:end]
+        else:
+            events = np.concatenate((self.buffer[start:], self.buffer[:end]))
+        data = io.BytesIO()
+        np.savez(data, **{name: events[name] for name in EVENT_DTYPE.names})
+        path = os.path.join(self.directory, f'{self.prefix}_{self.chunks:06d}.npz')
+        with open(path + '.tmp', 'wb') as file:
+            file.write(data.getbuffer())
+        os.replace(path + '.tmp', path)
+        self.chunks += 1
+        # Only now can the game reuse the rows
+        self.tail = head
+        return head - tail
+
+    def close(self):
+        """ Stops the thread and writes whatever is left """
+        self.closing = True
+        self.wake.set()
+        self.thread.join()
+        self.flush()
+
+
+def chunk_paths(directory):
+    """ Chunks in a log folder, oldest first """
+    return sorted(glob.glob(os.path.join(directory, 'chunk_*.npz')))
+
+
+def read(directory, columns=None, kind=None):
+    """
+    Loads a log folder's events
+    Parameters:
+        - directory (str): The log folder
+        - columns (list): Names of the columns to load, all of them if None
+        - kind (int): Only load events of this kind, all of them if None
+    Returns:
+        dict: Column name to an array of that column for every event, oldest first
+    """
+    names = list(EVENT_DTYPE.names if columns is None else columns)
+    wanted = names if kind is None or 'kind' in names else names + ['kind']
+    parts = {name: [] for name in wanted}
+    for path in chunk_paths(directory):
+        with np.load(path) as chunk:
+            for name in wanted:
+                parts[name].append(chunk[name])
+    result = {name: np.concatenate(arrays) if arrays else np.zeros(0, EVENT_DTYPE[name])
+              for name, arrays in parts.items()}
+    if kind is not None:
+        keep = result['kind'] == kind
+        result = {name: values[keep] for name, values in result.items()}
+    return {name: result[name] for name in names}
+
+
+def summary(directory):
+    """
+    Balancing numbers from a log folder
+    Parameters:
+        - directory (str): The log folder
+    Returns:
+        list: Lines of text, kills, shots, accuracy and time to kill for each board and AI level by
+        wave, then how many times the human died on each wave
+    """
+    events = read(directory)
+    lines = [f'{len(events["kind"])} events from {len(np.unique(events["game"]))} games in '
+             f'{len(chunk_paths(directory))} chunks']
+    lines.append(f'{"board":>6}{"level":>6}{"wave":>6}{"kills":>8}{"shots":>8}{"missed":>8}{"hit %":>8}'
+                 f'{"ttk s":>8}')
+    groups = np.stack((events['board'], events['ai_level'], events['wave']), axis=1)
+    for board, level, wave in np.unique(groups, axis=0).tolist():
+        group = (events['board'] == board) & (events['ai_level'] == level) & (events['wave'] == wave)
+        kinds = events['kind'][group]
+        kills, shots, missed = (int(np.count_nonzero(kinds == kind)) for kind in (KILL, SHOT, MISS))
+        ttk = events['value'][group & (events['kind'] == KILL)]
+        lines.append(f'{board:6}{level:6}{wave:6}{kills:8}{shots:8}{missed:8}'
+                     f'{kills / shots * 100 if shots else 0:8.1f}{ttk.mean() if len(ttk) else 0:8.2f}')
+    deaths = events['wave'][(events['kind'] == DEATH) & (events['board'] == 0)]
+    waves, counts = np.unique(deaths, return_counts=True)
+    lines.append('Human deaths by wave: ' + (', '.join(f'{wave}: {count}' for wave, count in
+                                                    zip(waves.tolist(), counts.tolist())) or 'none'))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize a telemetry log folder')
+    parser.add_argument('directory', help='folder the game wrote its telemetry to')
+    args = parser.parse_args()
+    print('\n'.join(summary(args.directory)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+
+import engine
+
+# Runs many seeded AI-only games for each AI level on every core and summarizes how
+# far each level gets. Games are handed to workers in batches and each batch comes
+# back as running totals, so 100k games cost one small message per batch.
+
+# Games per task sent to a worker
+BATCH_SIZE = 50
+# Safety net for a game that never ends, wave 13 is normally reached long before
+MAX_FRAMES = 60 * 60 * 60
+
+# Summary columns, in CSV order
+FIELDS = ['level', 'games', 'avg_waves_survived', 'min_waves_survived', 'max_waves_survived',
+          'survived_all', 'capped', 'kills', 'shots', 'missed', 'kill_rate', 'miss_rate', 'avg_frames']
+
+
+def play(level, seed):
+    """
+    Plays one game with only the AI's board until the AI dies or every wave is beaten
+    Parameters:
+        - level (int): AI level to play every wave with
+        - seed (int): Seed for the game
+    Returns:
+        dict: waves survived, whether MAX_FRAMES cut the game short, kills, shots, missed and frames
+        of the game
+    """
+    game = engine.GameEngine(seed, ai_level=level, human=False)
+    while game.step() and game.frame < MAX_FRAMES:
+        pass
+    # The wave the AI died on doesn't count as survived, and neither does the one a capped game
+    # was stopped on, but a capped game didn't die so it is counted apart
+    capped = not game.finished
+    waves_survived = game.wave if game.wave == 13 else game.wave - 1
+    return {
+        'waves_survived': min(waves_survived, 12),
+        'capped': capped,
+        'kills': game.kills[engine.AI_BOARD],
+        'shots': game.shots[engine.AI_BOARD],
+        'missed': game.missed[engine.AI_BOARD],
+        'frames': game.frame,
+    }
+
+
+def play_batch(task):
+    """
+    Plays a batch of consecutive seeds for one level, runs in a worker process
+    Parameters:
+        - task (tuple): (level, first seed, number of games)
+    Returns:
+        tuple: (level, totals dict)
+    """
+    level, first_seed, count = task
+    totals = {'games': 0, 'waves_survived': 0, 'min_waves_survived': 12, 'max_waves_survived': 0,
+              'survived_all': 0, 'capped': 0, 'kills': 0, 'shots': 0, 'missed': 0, 'frames': 0}
+    for seed in range(first_seed, first_seed + count):
+        result = play(level, seed)
+        totals['games'] += 1
+        totals['waves_survived'] += result['waves_survived']
+        totals['min_waves_survived'] = min(totals['min_waves_survived'], result['waves_survived'])
+        totals['max_waves_survived'] = max(totals['max_waves_survived'], result['waves_survived'])
+        totals['survived_all'] += result['waves_survived'] == 12
+        totals['capped'] += result['capped']
+        totals['kills'] += result['kills']
+        totals['shots'] += result['shots']
+        totals['missed'] += result['missed']
+        totals['frames'] += result['frames']
+    return level, totals
+
+
+def merge(total, part):
+    """ Adds a batch's totals into the running totals for its level """
+    for key, value in part.items():
+        if key == 'min_waves_survived':
+            total[key] = min(total.get(key, value), value)
+        elif key == 'max_waves_survived':
+            total[key] = max(total.get(key, value), value)
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+def summarize(level, totals):
+    """ Turns a level's totals into one summary row """
+    games = max(totals['games'], 1)
+    shots = max(totals['shots'], 1)
+    return {
+        'level': level,
+        'games': totals['games'],
+        'avg_waves_survived': round(totals['waves_survived'] / games, 3),
+        'min_waves_survived': totals['min_waves_survived'],
+        'max_waves_survived': totals['max_waves_survived'],
+        'survived_all': totals['survived_all'],
+        # Games stopped by MAX_FRAMES while still playing
+        'capped': totals['capped'],
+        'kills': totals['kills'],
+        'shots': totals['shots'],
+        'missed': totals['missed'],
+        # Kills and misses per shot fired
+        'kill_rate': round(totals['kills'] / shots, 4),
+        'miss_rate': round(totals['missed'] / shots, 4),
+        'avg_frames': round(totals['frames'] / games, 1),
+    }
+
+
+def run(games, levels, workers=None, first_seed=0, batch_size=BATCH_SIZE):
+    """
+    Plays games seeded games for each level across a pool of worker processes. Every level plays
+    the same seeds so levels are compared on the same waves
+    Parameters:
+        - games (int): Games per level
+        - levels (list): AI levels to play
+        - workers (int): Worker processes, one per core if None
+        - first_seed (int): Seed of the first game, the rest follow on
+        - batch_size (int): Games per task sent to a worker
+    Returns:
+        list: One summary row per level
+    """
+    tasks = [(level, seed, min(batch_size, first_seed + games - seed))
+             for level in levels
+             for seed in range(first_seed, first_seed + games, batch_size)]
+    totals = {level: {} for level in levels}
+    with multiprocessing.Pool(workers) as pool:
+        for level, part in pool.imap_unordered(play_batch, tasks):
+            merge(totals[level], part)
+    return [summarize(level, totals[level]) for level in levels]
+
+
+def write_csv(rows, path):
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play seeded AI-only games for each AI level and summarize them')
+    parser.add_argument('--games', type=int, default=1000, help='games per AI level')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 2, 3, 4], help='AI levels to play')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help='games per worker task')
+    parser.add_argument('--json', help='write the summary to this JSON file')
+    parser.add_argument('--csv', help='write the summary to this CSV file')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = run(args.games, args.levels, args.workers, args.seed, args.batch)
+    seconds = time.perf_counter() - start
+
+    for row in rows:
+        print(', '.join(f'{key}={row[key]}' for key in FIELDS))
+    total_games = args.games * len(args.levels)
+    print(f'{total_games} games in {seconds:.1f}s ({total_games / seconds:.1f} games/s on {args.workers} workers)')
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'games': args.games, 'first_seed': args.seed, 'levels': rows}, file, indent=2)
+    if args.csv:
+        write_csv(rows, args.csv)
+
+
+if __name__ == "__main__":
+    main()
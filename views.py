@@ -0,0 +1,1008 @@
+import arcade
+import arena
+import assets
+import boot
+import numpy as np
+import os
+import random
+import time
+import explosion as ex
+import hud
+import quality
+from pool import Pool
+from profiler import FrameProfiler
+import replay
+
+import engine
+from engine import SCREEN_WIDTH, SCREEN_HEIGHT
+
+# Constants
+PLAYER_RADIUS = 50
+MAP_SCALING = 1.0
+# Most dead sprites kept for reuse, and how many are built up front
+ENEMY_POOL_SIZE = 128
+MISSILE_POOL_SIZE = 256
+ENEMY_POOL_PREWARM = 40
+MISSILE_POOL_PREWARM = 32
+# Most simulation steps run in one update when catching up after a slow frame. Past this
+# the leftover time is dropped, so a long stall slows the game briefly instead of freezing
+# it while a pile of steps runs
+MAX_STEPS_PER_UPDATE = 5
+# Height of the game window, and the widest it gets before the boards are scaled down to fit
+GAME_WINDOW_HEIGHT = 710
+MAX_WINDOW_WIDTH = 1800
+# Stress tests count a frame as slow when it comes this long after the last one, a little
+# over a 60 FPS frame so timer jitter doesn't count, and time every phase of this many frames
+SLOW_FRAME_TIME = engine.STEP_TIME * 1.1
+STRESS_PROFILE_FRAMES = 3600
+# Enemies and missiles only get a sprite while they are within this many pixels of the
+# visible area, enough for the largest sprite to be partly in view
+SPRITE_CULL_MARGIN = 50
+
+from assets import ASSETS_PATH
+# Names of the AI levels shown in the HUD
+AI_LEVEL_NAMES = {1: 'Random Shooting', 2: 'Sweep', 3: 'Lowest Enemy First', 4: 'Sharpshooter', 5: 'Lookahead'}
+
+# Textures loaded in the background while the window opens, the title screen first and
+# every other image after it
+TITLE_ASSETS = ['title_screen.png']
+
+class Player(arcade.Sprite):
+    def __init__(self, center_x):
+        super().__init__(texture=assets.manager.texture('fighter.png'))  # Replace with your player sprite file
+        self.center_x = center_x
+        self.center_y = 25
+        
+class Enemy(arcade.Sprite):
+    def __init__(self,spawn_x, spawn_y):
+        super().__init__(texture=assets.manager.texture('enemy.png'))  # Replace with your player sprite file
+        self.reset(spawn_x, spawn_y)
+
+    def reset(self, spawn_x, spawn_y):
+        # Called when a pooled sprite is reused
+        self.center_x = spawn_x
+        self.center_y = spawn_y
+    
+class Missile(arcade.Sprite):
+    def __init__(self,spawn_x, spawn_y):
+        super().__init__(texture=assets.manager.texture('missile.png'))  # Replace with your player sprite file
+        self.reset(spawn_x, spawn_y)
+
+    def reset(self, spawn_x, spawn_y):
+        # Called when a pooled sprite is reused
+        self.center_x = spawn_x
+        self.center_y = spawn_y
+
+class HumanVsAiView(arcade.View):
+    # Folder every game is recorded into as a replay, None to not record
+    replay_dir = None
+    # TelemetryLog every game played logs its events to, None to not log (from --telemetry)
+    telemetry_log = None
+    # Level of each AI board next to the player's, None ramps the level up with the waves
+    ai_levels = [None]
+    # Scene built once and shared by every game, see get_scene
+    shared_scene = None
+    # Background of each AI board and ship of each board, made as more boards are needed and reused
+    ai_background_sprites = []
+    ship_sprite_cache = []
+    # Dead enemy and missile sprites waiting to be reused, shared by every game
+    sprite_pools = None
+    # Particles and smoke of every explosion, emptied for each new game
+    explosion_emitter = None
+    # Picks the explosions' quality level from recent frame times, kept across games.
+    # Its level is the one to log, quality_level pins it (from --quality)
+    quality_controller = None
+    quality_level = None
+    # Score, wave and AI level text shared by every game, see get_hud
+    hud_text = None
+
+    def __init__(self, seed = None, playback = None, seek = 0):
+        """
+        Class constructor, initializes class attributes that are used throughout the class, calls setup
+        Parameters:
+            - self (HumanVsAI): This class instance
+            - seed (int): Seed for the game simulation, random if None
+            - playback (replay.Replay): Replay to play back instead of taking input from the keyboard
+            - seek (int): Frame of the replay to start playing back from
+        Returns:
+            None
+        """
+        super().__init__()
+        arcade.set_background_color(arcade.color.BLACK)
+
+        # Seed the game simulation is started with
+        self.seed = seed
+        # Replay being played back, and the frame it starts from
+        self.playback = playback
+        self.seek = seek
+        # Records the game when replay_dir is set
+        self.recorder = None
+        # Headless simulation holding the game rules and state
+        self.engine = None
+        # Real time not yet simulated, less than one step except right after a slow frame
+        self.accumulator = 0.0
+        # Scene with all sprites
+        self.scene = None
+        # Player sprite
+        self.player = None
+        # Ship sprite of each board, the player's first
+        self.ship_sprites = []
+        # Sprite drawn for each live enemy and missile in the simulation
+        self.entity_sprites = {}
+        # Particles and smoke of every explosion, the shared emitter
+        self.explosions = None
+        # Entities left out of the last frame's drawing because they were out of view
+        self.culled = {'enemies': 0, 'missiles': 0}
+        # Dead enemy and missile sprites waiting to be reused, kept across restarts
+        if HumanVsAiView.sprite_pools is None:
+            HumanVsAiView.sprite_pools = {
+                Enemy: Pool(Enemy, ENEMY_POOL_SIZE),
+                Missile: Pool(Missile, MISSILE_POOL_SIZE),
+            }
+            self.sprite_pools[Enemy].prewarm(ENEMY_POOL_PREWARM, 0, 0)
+            self.sprite_pools[Missile].prewarm(MISSILE_POOL_PREWARM, 0, 0)
+        # Per-phase frame timing, only recorded while profiling is toggled on (F3)
+        self.profiler = FrameProfiler()
+        self.profiling = False
+        # Score, wave and AI level text, laid out again only when they change
+        self.hud = None
+        # (score, wave, boards out) the HUD text was last built for
+        self.hud_state = None
+        self.setup()
+
+    @property
+    def score(self):
+        return self.engine.score
+
+    @property
+    def wave(self):
+        return self.engine.wave
+
+    @property
+    def game_over(self):
+        return self.engine.game_over
+
+    @property
+    def world_width(self):
+        """ Width of all the boards side by side, in game pixels """
+        return (len(self.engine.boards) - 1) * engine.AI_BOARD_OFFSET + SCREEN_WIDTH
+
+    def window_size(self):
+        """
+        Size of the window that shows every board, scaled down when they don't fit in MAX_WINDOW_WIDTH
+        Parameters:
+            - self (HumanVsAI): This class instance
+        Returns:
+            tuple: (width, height) in screen pixels
+        """
+        scale = min(1, MAX_WINDOW_WIDTH / self.world_width)
+        return int(self.world_width * scale), int(GAME_WINDOW_HEIGHT * scale)
+
+    def setup(self):
+        """
+        Game setup, includes starting a new simulation, loading background and initializing player, AI player,
+        and empty lists for enemies and missiles then adds them all to scene
+        Parameters:
+            - self (HumanVsAI): This class instance
+        
+        Returns:
+            None
+        """
+        if self.playback is not None:
+            self.engine = self.playback.seek(self.seek)
+        else:
+            self.engine = self.new_engine()
+            if self.replay_dir is not None:
+                self.recorder = replay.ReplayRecorder(self.engine)
+            else:
+                # Level 5 AIs plan against the clock, unless the game has to be replayable
+                self.engine.realtime_planning = True
+            self.engine.telemetry = self.telemetry_log
+        if self.profiling:
+            self.engine.profiler = self.profiler
+        self.accumulator = 0.0
+        # Sprites of the previous game, which may have been another view's, go back to their pools
+        self.scene = self.get_scene()
+        for name, sprite_type in (('enemies', Enemy), ('missiles', Missile)):
+            sprite_list = self.scene.get_sprite_list(name)
+            while len(sprite_list) > 0:
+                sprite = sprite_list[-1]
+                sprite.remove_from_sprite_lists()
+                self.sprite_pools[sprite_type].release(sprite)
+        self.entity_sprites = {}
+        if HumanVsAiView.explosion_emitter is None:
+            HumanVsAiView.explosion_emitter = ex.ExplosionEmitter()
+        self.explosions = self.explosion_emitter
+        self.explosions.clear()
+        if HumanVsAiView.quality_controller is None:
+            HumanVsAiView.quality_controller = quality.QualityController(len(ex.QUALITY_LEVELS), engine.STEP_TIME,
+                                                                         self.quality_level)
+            self.quality_controller.adaptive = self.quality_level is None
+        self.explosions.quality = ex.QUALITY_LEVELS[self.quality_controller.level]
+
+        # Add a game screen for each AI player, the map only has the player's
+        boards = self.engine.boards
+        ai_boards = boards[engine.AI_BOARD:]
+        while len(self.ai_background_sprites) < len(ai_boards):
+            offset = (len(self.ai_background_sprites) + engine.AI_BOARD) * engine.AI_BOARD_OFFSET
+            self.ai_background_sprites.append(arcade.sprite.Sprite(texture=assets.manager.texture('background.png'),
+                                                                   center_x=250+offset, center_y=375))
+        self.refill('ai_background', self.ai_background_sprites[:len(ai_boards)])
+        # Initialize player and AI players, reusing the ships of earlier games
+        while len(self.ship_sprite_cache) < len(boards):
+            self.ship_sprite_cache.append(Player(0))
+        self.ship_sprites = self.ship_sprite_cache[:len(boards)]
+        for board, sprite in zip(boards, self.ship_sprites):
+            sprite.position = board.ship.position
+        self.player = self.ship_sprites[engine.PLAYER_BOARD]
+        self.refill('player', self.ship_sprites[:engine.AI_BOARD])
+        self.refill('cpu', self.ship_sprites[engine.AI_BOARD:])
+
+        self.hud = self.get_hud(len(boards))
+        self.hud_state = None
+
+    def refill(self, name, sprites):
+        """
+        Makes a sprite list of the scene hold exactly these sprites. Sprites are removed one at a time
+        rather than clearing the list, which would give it new GPU buffers
+        Parameters:
+            - self (HumanVsAI): This class instance
+            - name (str): Name of the sprite list
+            - sprites (list): Sprites it should hold, in order
+        Returns:
+            None
+        """
+        sprite_list = self.scene.get_sprite_list(name)
+        if list(sprite_list) == sprites:
+            return
+        while len(sprite_list) > 0:
+            sprite_list[-1].remove_from_sprite_lists()
+        for sprite in sprites:
+            # A ship that blew up last game has to be taken out of any other list first
+            sprite.remove_from_sprite_lists()
+            sprite_list.append(sprite)
+
+    @classmethod
+    def get_hud(cls, boards):
+        """
+        Builds the HUD text the first time it is called, then makes sure there is AI level text over
+        each AI board of a game with this many boards and hides the text of any boards past them
+        Parameters:
+            - cls (type): HumanVsAiView
+            - boards (int): Number of boards in the game, the player's included
+        Returns:
+            hud.TextBatch: The HUD text
+        """
+        if cls.hud_text is None:
+            cls.hud_text = hud.TextBatch()
+            cls.hud_text.add('score', '', 10, SCREEN_HEIGHT - 25, arcade.color.WHITE, 20)
+            cls.hud_text.add('wave', '', 380, SCREEN_HEIGHT - 25, arcade.color.WHITE, 20)
+        hud_text = cls.hud_text
+        index = engine.AI_BOARD
+        while index < boards or f'ai_level_{index}' in hud_text.texts:
+            name = f'ai_level_{index}'
+            if name not in hud_text.texts:
+                hud_text.add(name, '', index * engine.AI_BOARD_OFFSET + 20, SCREEN_HEIGHT - 25, arcade.color.WHITE, 20)
+            if index >= boards:
+                hud_text.set_visible(name, False)
+            index += 1
+        return hud_text
+
+    @classmethod
+    def get_scene(cls):
+        """
+        Parses the tile map and builds the scene the first time it is called, every game after the first
+        reuses it. The map's layers never change, and the backgrounds, ships, enemies and missiles lists
+        are refilled by setup for each game, so restarting only costs refilling them
+        Parameters:
+            - cls (type): HumanVsAiView
+        Returns:
+            arcade.Scene: The scene
+        """
+        if cls.shared_scene is None:
+            # Get file path to TileMap
+            map_path = ASSETS_PATH + '/galaga_map.tmx'
+
+            # Specify layer options
+            layer_options = {
+                'game_borders': {
+                    'use_spatial_hash': True,
+                },
+            }
+            #Load map, its images are the asset manager's so they aren't loaded again
+            tile_map = arcade.tilemap.TileMap(map_path, MAP_SCALING,layer_options,None,'Simple',4.5,None,(0,375))
+            cls.shared_scene = arcade.Scene.from_tilemap(tile_map)
+            # Add empty lists for the AI boards' backgrounds, the ships, and the enemies and missiles. Each is
+            # shared by every board so each kind of sprite draws in one call however many boards there are
+            for name in ('ai_background', 'player', 'cpu', 'enemies', 'missiles'):
+                cls.shared_scene.add_sprite_list(name)
+        return cls.shared_scene
+
+    def on_draw(self):
+        """
+        This function renders the state of the game regardless of what it is, leaves state unchanged
+
+        Parameters:
+            - self (HumanVsAI): This class instance
+        
+        Returns:
+            None
+        """
+        profiler = self.profiler if self.profiling else None
+        if profiler:
+            profiler.start()
+        arcade.start_render()
+        # Clear the screen
+        self.clear()
+        # Show every board, scaled down if the window is narrower than they are
+        arcade.set_viewport(0, self.world_width, 0, GAME_WINDOW_HEIGHT)
+
+        # Draw the scene, then every explosion on top in one batch
+        self.scene.draw()
+        if profiler:
+            profiler.lap('draw_scene')
+        self.explosions.draw((0, self.world_width, 0, GAME_WINDOW_HEIGHT))
+        if profiler:
+            profiler.lap('draw_explosions')
+
+        # Render the Score, Wave and AI Level text
+        self.update_hud()
+        self.hud.draw()
+        if profiler:
+            profiler.lap('draw_hud')
+            self.draw_profiler_overlay()
+            profiler.end_frame()
+
+    def update_hud(self):
+        """
+        Rebuilds the Score, Wave and AI Level text if the score, wave or boards still playing changed since
+        it was last built
+        Parameters:
+            - self (HumanVsAI): This class instance
+        Returns:
+            None
+        """
+        boards = self.engine.boards
+        state = (self.score, self.wave, tuple(board.out for board in boards))
+        if state == self.hud_state:
+            return
+        self.hud_state = state
+        self.hud.set_text('score', f"Score: {self.score}")
+        self.hud.set_text('wave', f"Wave: {self.wave}")
+        for board in boards[engine.AI_BOARD:]:
+            name = f'ai_level_{board.index}'
+            level = self.engine.current_ai_level(board.index)
+            if level in AI_LEVEL_NAMES:
+                self.hud.set_text(name, f"Lvl {level} AI: {AI_LEVEL_NAMES[level]}" + (" (out)" if board.out else ""))
+            self.hud.set_visible(name, level in AI_LEVEL_NAMES)
+
+    def draw_profiler_overlay(self):
+        """
+        Draws the p50/p95/p99 of each frame phase, the number of sprites in each SpriteList and how well
+        the sprite pools and the explosion emitter are reused
+        Parameters:
+            - self (HumanVsAI): This class instance
+        Returns:
+            None
+        """
+        lines = self.profiler.summary_lines()
+        lines.append('')
+        for name in self.scene.name_mapping:
+            lines.append(f'{name:<16}{len(self.scene.get_sprite_list(name)):8}')
+        lines.append(f'{"explosions":<16}{len(self.explosions):8}')
+        lines.append(f'{"quality":<16}{self.quality_controller.level:8}/{len(ex.QUALITY_LEVELS) - 1}')
+        lines.append('')
+        lines.append(f'{"culled":<16}' + ''.join(f'{name:>10}' for name in ('dormant', 'enemies', 'missiles', 'particles')))
+        lines.append(f'{"":<16}{self.engine.culled:10}{self.culled["enemies"]:10}{self.culled["missiles"]:10}'
+                     f'{self.explosions.culled:10}')
+        lines.append('')
+        lines.append(f'{"pools":<16}' + ''.join(f'{name:>10}' for name in ('hits', 'misses', 'in use', 'peak')))
+        for name, stats in self.pool_stats().items():
+            lines.append(f'{name:<16}{stats.hits:10}{stats.misses:10}{stats.in_use:10}{stats.peak:10}')
+        y = SCREEN_HEIGHT - 60
+        for line in lines:
+            arcade.draw_text(line, 10, y, arcade.color.YELLOW, 10, font_name='Courier New')
+            y -= 14
+
+    def on_update(self, delta_time):
+        """
+        This function runs as many fixed simulation steps as the time since the last tick covers, turns
+        kills and deaths into explosions, then mirrors the game into the scene. The game runs at the
+        same speed whatever the frame rate, slow frames just draw fewer of its steps
+
+        Parameters:
+            - self (HumanVsAI): This class instance
+            - delta_time (float): Time since this function last ran
+        
+        Returns:
+            None
+        """
+        profiler = self.profiler if self.profiling else None
+        if profiler:
+            profiler.begin_frame()
+        # Explosions get cheaper while frames run over budget and richer again once they don't
+        if self.quality_controller.add_frame(delta_time):
+            self.explosions.quality = ex.QUALITY_LEVELS[self.quality_controller.level]
+        self.accumulator += delta_time
+        steps = 0
+        while self.accumulator >= engine.STEP_TIME and steps < MAX_STEPS_PER_UPDATE:
+            if self.playback is not None:
+                self.playback.apply_inputs(self.engine)
+            if not self.engine.step():
+                self.end_game()
+                return
+            self.accumulator -= engine.STEP_TIME
+            steps += 1
+            for event in self.engine.events:
+                if event[0] == 'kill':
+                    self.explosions.emit(event[1].position)
+                elif event[0] == 'death':
+                    # Make an explosion on enemy and on player who died
+                    self.explosions.emit(event[1].position)
+                    self.explosions.emit(event[2].position)
+            if profiler:
+                profiler.lap('events')
+            # Explosions are only visual, but they age with the game's steps so they last as long at any frame rate
+            self.explosions.update()
+            if profiler:
+                profiler.lap('explosions')
+        if self.accumulator >= engine.STEP_TIME:
+            # Too far behind to catch up, drop the whole steps that are left
+            self.accumulator %= engine.STEP_TIME
+        # Draw each entity the fraction of a step the leftover time covers past its previous position
+        self.sync_sprites(self.accumulator / engine.STEP_TIME)
+        if profiler:
+            profiler.lap('sync')
+
+    def sync_sprites(self, alpha=1.0):
+        """
+        Moves every sprite to the position of the entity it draws, creating sprites for new enemies and
+        missiles and removing the sprites of dead ones. Enemies and missiles out of view have no sprite,
+        so the scene only draws what can be seen. Sprites only draw, the game itself is in the engine
+        Parameters:
+            - self (HumanVsAI): This class instance
+            - alpha (float): How far between the previous and the latest step to draw, 0 to 1
+        Returns:
+            None
+        """
+        boards = self.engine.boards
+        for board, sprite in zip(boards, self.ship_sprites):
+            if board.ship.alive:
+                sprite.position = board.ship.interpolated(alpha)
+            else:
+                sprite.kill()
+
+        store = self.engine.store
+        top = GAME_WINDOW_HEIGHT + SPRITE_CULL_MARGIN
+        for name, sprite_type in (('enemies', Enemy), ('missiles', Missile)):
+            sprite_list = self.scene.get_sprite_list(name)
+            culled = 0
+            entities = [entity for board in boards for entity in getattr(board, name)]
+            # Where to draw every one of them, worked out at once from the store's columns
+            xs, ys = store.interpolated(store.slots(entities), alpha)
+            for entity, x, y in zip(entities, xs.tolist(), ys.tolist()):
+                sprite = self.entity_sprites.get(entity)
+                if y >= top:
+                    culled += 1
+                    if sprite is not None:
+                        # Gone out of view, its sprite can be reused meanwhile
+                        sprite.remove_from_sprite_lists()
+                        self.sprite_pools[sprite_type].release(sprite)
+                        del self.entity_sprites[entity]
+                elif sprite is None:
+                    sprite = self.sprite_pools[sprite_type].acquire(x, y)
+                    self.entity_sprites[entity] = sprite
+                    sprite_list.append(sprite)
+                else:
+                    sprite.position = x, y
+            self.culled[name] = culled
+
+        # Drop the sprites of entities that died, their slots can't be reused while they are keys here
+        drawn = list(self.entity_sprites)
+        for index in np.flatnonzero(~store.alive[store.slots(drawn)]).tolist():
+            sprite = self.entity_sprites.pop(drawn[index])
+            sprite.remove_from_sprite_lists()
+            self.sprite_pools[type(sprite)].release(sprite)
+
+    def new_engine(self):
+        """ Simulation for a new game, setup calls this unless a replay is being watched """
+        return engine.GameEngine(self.seed, ai_levels=self.ai_levels)
+
+    def end_game(self):
+        """
+        Called once the game has finished, saves its replay if recording and shows the GameOver screen
+        Parameters:
+            - self (HumanVsAI): This class instance
+        Returns:
+            None
+        """
+        if self.recorder is not None:
+            self.save_replay()
+        # If game has been over for 2 seconds, display GameOver screen, window must be resized for new screen
+        game_over_view = GameOverView(self.score,self.wave, self.game_over)
+        self.window.set_size(480,710)
+        self.window.show_view(game_over_view)
+
+    def save_replay(self):
+        """
+        Writes the recorded game to a new file in replay_dir
+        Parameters:
+            - self (HumanVsAI): This class instance
+        Returns:
+            None
+        """
+        os.makedirs(self.replay_dir, exist_ok=True)
+        path = os.path.join(self.replay_dir, f'replay_{time.strftime("%Y%m%d_%H%M%S")}_{self.engine.seed}.hvr')
+        self.recorder.save(self.engine, path)
+        self.recorder = None
+        print(f'Saved replay to {path}')
+
+    def pool_stats(self):
+        """
+        Reuse counters of the sprite pools and the explosion emitter, for checking allocation churn
+        Parameters:
+            - self (HumanVsAI): This class instance
+        Returns:
+            dict: Pool name to PoolStats
+        """
+        return {
+            'enemies': self.sprite_pools[Enemy].stats,
+            'missiles': self.sprite_pools[Missile].stats,
+            'explosions': self.explosions.stats,
+        }
+
+    def on_key_press(self, key, modifiers):
+        """
+        Sets player movement to left and right arrow keys, Space to shoot missiles, Escape to pause and quit to menu,
+        F3 to toggle the frame profiler overlay and F4 to save its frame samples
+        Parameters:
+            - self (HumanVsAI): This class instance
+            - key (arcade.key): key being released
+            - modifiers: extra state of key being released (Ex. Caps Lock or holding Shift/Ctrl)
+        
+        Returns:
+            None
+        """
+        if self.playback is not None and key in (arcade.key.LEFT, arcade.key.RIGHT, arcade.key.SPACE):
+            # Replays only play the recorded inputs
+            return
+        if key == arcade.key.LEFT:
+            # Movement to the left is in the -x direction
+            self.engine.press(engine.INPUT_LEFT)
+        elif key == arcade.key.RIGHT:
+            # Movement to the right is in the +x direction
+            self.engine.press(engine.INPUT_RIGHT)
+        elif key == arcade.key.SPACE:
+            # The simulation ensures a 0.5 second delay between missile firing
+            self.engine.press(engine.INPUT_FIRE)
+        elif key == arcade.key.F3:
+            self.profiling = not self.profiling
+            self.engine.profiler = self.profiler if self.profiling else None
+        elif key == arcade.key.F4:
+            path = f'profile_{time.strftime("%Y%m%d_%H%M%S")}.csv'
+            self.profiler.dump(path)
+            print(f'Saved frame profile to {path}')
+        elif key == arcade.key.ESCAPE:
+            #Pause and quit to menu
+            title_view = TitleView(self)
+            self.window.set_size(480,710)
+            self.window.show_view(title_view)
+            
+
+    def on_key_release(self, key, modifiers):
+        """
+        Sets player movement to 0 when left or right arrow key is released
+        Parameters:
+            - self (HumanVsAI): This class instance
+            - key (arcade.key): key being released
+            - modifiers: extra state of key being released (Ex. Caps Lock or holding Shift/Ctrl)
+        
+        Returns:
+            None
+        """
+        if self.playback is not None:
+            return
+        if key == arcade.key.LEFT:
+            self.engine.release(engine.INPUT_LEFT)
+        elif key == arcade.key.RIGHT:
+            self.engine.release(engine.INPUT_RIGHT)
+
+
+class StressView(HumanVsAiView):
+    def __init__(self, enemies, fire_rate=0, explosion_rate=0):
+        """
+        Class constructor, a game under a chosen load for finding where it stops holding 60 FPS. Every wave
+        puts the given number of enemies on each board, ships can be made to fire and explosions to go off
+        at a fixed rate, and the game starts over whenever it ends. Frame times are kept for summary_lines
+        Parameters:
+            - self (StressView): This class instance
+            - enemies (int): Enemies on each board in every wave
+            - fire_rate (float): Missiles every ship fires each second, on top of the player's and AI's own
+            - explosion_rate (float): Explosions set off each second at random spots on the boards
+        Returns:
+            None
+        """
+        self.wave_enemies = enemies
+        self.fire_rate = fire_rate
+        self.explosion_rate = explosion_rate
+        # Missiles and explosions due but not made yet, carried over between frames
+        self.fire_owed = 0.0
+        self.explosions_owed = 0.0
+        # Stress games can't be replayed, the forced missiles aren't part of the recording
+        self.replay_dir = None
+        # Seconds between frames, and seconds each frame spent in on_update and on_draw
+        self.frame_times = []
+        self.work_times = []
+        self.update_time = 0.0
+        # Most enemies, missiles and explosion particles alive at once, and games started over
+        self.peaks = {'enemies': 0, 'missiles': 0, 'explosions': 0}
+        self.restarts = 0
+        super().__init__()
+        # Time every phase of every frame, the overlay can still be shown with F3
+        self.profiler = FrameProfiler(capacity=STRESS_PROFILE_FRAMES)
+        self.engine.profiler = self.profiler
+        self.profiling = True
+
+    def new_engine(self):
+        return engine.GameEngine(self.seed, ai_levels=self.ai_levels, wave_enemies=self.wave_enemies)
+
+    def end_game(self):
+        # Start over instead of showing the GameOver screen
+        self.restarts += 1
+        self.setup()
+        self.engine.profiler = self.profiler
+
+    def on_update(self, delta_time):
+        """
+        Fires the forced missiles and sets off the forced explosions due since the last frame, then runs
+        the game as usual
+        Parameters:
+            - self (StressView): This class instance
+            - delta_time (float): Time since this function last ran
+        Returns:
+            None
+        """
+        start = time.perf_counter()
+        self.frame_times.append(delta_time)
+        self.fire_owed += delta_time * self.fire_rate
+        while self.fire_owed >= 1:
+            self.fire_owed -= 1
+            for board in self.engine.boards:
+                if board.active and not board.out:
+                    self.engine.fire(board.ship)
+        self.explosions_owed += delta_time * self.explosion_rate
+        while self.explosions_owed >= 1:
+            self.explosions_owed -= 1
+            self.explosions.emit((random.uniform(0, self.world_width), random.uniform(100, GAME_WINDOW_HEIGHT - 100)))
+        super().on_update(delta_time)
+
+        boards = self.engine.boards
+        peaks = self.peaks
+        peaks['enemies'] = max(peaks['enemies'], sum(len(board.enemies) + len(board.dormant) for board in boards))
+        peaks['missiles'] = max(peaks['missiles'], sum(len(board.missiles) for board in boards))
+        peaks['explosions'] = max(peaks['explosions'], len(self.explosions))
+        self.update_time = time.perf_counter() - start
+
+    def on_draw(self):
+        start = time.perf_counter()
+        super().on_draw()
+        self.work_times.append(self.update_time + time.perf_counter() - start)
+
+    def summary_lines(self):
+        """
+        Text summing up the frame times of the whole run
+        Parameters:
+            - self (StressView): This class instance
+        Returns:
+            list: Lines of text
+        """
+        levels = ', '.join(str(level or 'by wave') for level in self.ai_levels)
+        lines = [f'Stress test: {self.wave_enemies} enemies per board, {self.fire_rate:g} forced missiles/s per ship, '
+                 f'{self.explosion_rate:g} explosions/s, AI levels {levels}']
+        # The first frame's time covers starting up, not the game
+        intervals = np.array(self.frame_times[1:]) * 1000
+        work = np.array(self.work_times[1:]) * 1000
+        if len(intervals) == 0 or len(work) == 0:
+            return lines + ['No frames were run']
+        slow = np.count_nonzero(intervals > SLOW_FRAME_TIME * 1000)
+        lines.append(f'{len(intervals)} frames, {1000 / intervals.mean():.1f} FPS on average, '
+                     f'{slow / len(intervals) * 100:.1f}% of frames slower than 60 FPS')
+        lines.append(f'{"ms":<16}' + ''.join(f'{name:>8}' for name in ('mean', 'p50', 'p95', 'p99', 'max')))
+        for name, values in (('frame interval', intervals), ('update + draw', work)):
+            lines.append(f'{name:<16}{values.mean():8.2f}' +
+                         ''.join(f'{value:8.2f}' for value in np.percentile(values, (50, 95, 99))) +
+                         f'{values.max():8.2f}')
+        lines.append('Peak ' + ', '.join(f'{name} {count}' for name, count in self.peaks.items()) +
+                     f', {self.restarts} restarts, explosion quality {self.quality_controller.level} at the end')
+        lines.append(f'Phases over the last {len(self.profiler.frames())} frames:')
+        return lines + self.profiler.summary_lines()
+
+
+class ArenaClientView(HumanVsAiView):
+    def __init__(self, client):
+        """
+        Class constructor, draws a game running on an arena server (arena.py) instead of running it here.
+        Key presses go to the server, which only lets the session's first client play
+        Parameters:
+            - self (ArenaClientView): This class instance
+            - client (arena.ArenaClient): Connection to the session, already joined
+        Returns:
+            None
+        """
+        self.client = client
+        # The game is recorded on the server's side if anywhere
+        self.replay_dir = None
+        super().__init__(client.seed)
+
+    def new_engine(self):
+        return arena.MirrorGame(self.client)
+
+    def on_hide_view(self):
+        # Whatever comes next is a different game, leave the session
+        self.client.close()
+
+    def on_key_press(self, key, modifiers):
+        if key == arcade.key.ESCAPE:
+            # The server keeps playing, so there is no pausing, Escape leaves for the title screen
+            title_view = TitleView()
+            self.window.set_size(480,710)
+            self.window.show_view(title_view)
+        else:
+            super().on_key_press(key, modifiers)
+
+
+# Instructions shown on the title screen: name -> (text, y, color)
+INSTRUCTION_TEXT = {
+    'controls': ("Controls:", 300, arcade.color.FLORAL_WHITE),
+    'move': ("   - Arrows to move", 270, arcade.color.FLORAL_WHITE),
+    'shoot': ("   - SPACE to shoot", 240, arcade.color.FLORAL_WHITE),
+    'pause': ("   - ESC to pause and quit to title", 210, arcade.color.FLORAL_WHITE),
+    'score': ("Gain score for each enemy destroyed", 180, arcade.color.FLORAL_WHITE),
+    'levels': ("Lvl of the AI increases every 3 waves", 150, arcade.color.FLORAL_WHITE),
+    'goal': ("Goal", 120, arcade.color.FLORAL_WHITE),
+    'survive': ("   - Survive all 4 levels of AI", 90, arcade.color.FLORAL_WHITE),
+    'return': ("           Press ESC to return", 60, arcade.color.RED),
+}
+
+# Title screen
+class TitleView(arcade.View):
+    # Menu text shared by every TitleView, built the first time one is drawn
+    menu_text = None
+
+    def __init__(self, paused_game = None) -> None:
+        """
+        Class constructor, initializes class attributes that are used throughout the class
+        Parameters:
+            - self (TitleView): This class instance
+        Returns:
+            None
+        """
+        super().__init__()
+        #Load title image
+        self.title_image = assets.manager.texture('title_screen.png')
+
+        # Set our display timer
+        self.display_timer = 1.0
+
+        # Is the start text visible?
+        self.show_start = False
+
+        # Are the instructions being shown?
+        self.showing_instructions = False
+
+        # Store paused game (or nothing if running for first time)
+        self.paused_game = paused_game
+    
+    
+    def on_update(self, delta_time: float) -> None:
+        """
+        This function updates the state of the menu every tick, used for blinking text on screen
+
+        Parameters:
+            - self (TitleView): This class instance
+            - delta_time (float): Time since this function last ran
+        
+        Returns:
+            None
+        """
+        # First, count down the time
+        self.display_timer -= delta_time
+
+        # If the timer has run out, toggle start text
+        if not self.showing_instructions:
+            if self.display_timer < 0:
+                self.show_start = not self.show_start
+                # And reset the timer so the start text flashes slowly
+                self.display_timer = 2
+        else:
+            self.show_start = False
+
+            
+    def on_draw(self) -> None:
+        """
+        This function renders the state of the menu, includes background image, title text, and instructional text
+        text shown depends on state of boolean variables determined in on_update and on_key_press
+
+        Parameters:
+            - self (TitleView): This class instance
+        
+        Returns:
+            None
+        """
+        # Start the rendering loop
+        arcade.start_render()
+
+        # Draw a rectangle filled with our title image
+        arcade.draw_texture_rectangle(
+            center_x=SCREEN_WIDTH / 2,
+            center_y=SCREEN_HEIGHT / 2,
+            width=SCREEN_WIDTH,
+            height=SCREEN_HEIGHT,
+            texture=self.title_image,
+        )
+
+        # Show instructions if I is pressed, and start text if not blinking out
+        menu_text = self.get_menu_text()
+        for name in INSTRUCTION_TEXT:
+            menu_text.set_visible(name, self.showing_instructions)
+        menu_text.set_visible('start', self.show_start and self.paused_game == None)
+        menu_text.set_visible('resume', self.show_start and self.paused_game != None)
+        menu_text.set_visible('restart', self.show_start and self.paused_game != None)
+        menu_text.draw()
+
+        # Startup is finished once the first title screen has been drawn
+        if not boot.startup.reported:
+            boot.startup.mark('first frame')
+            boot.startup.report()
+            assets.manager.report()
+
+        
+    @classmethod
+    def get_menu_text(cls):
+        """
+        Builds the instructions and start text once, every TitleView after the first reuses them
+        Parameters:
+            - cls (type): TitleView
+        Returns:
+            hud.TextBatch: The menu text
+        """
+        if cls.menu_text is None:
+            cls.menu_text = hud.TextBatch()
+            for name, (text, y, color) in INSTRUCTION_TEXT.items():
+                cls.menu_text.add(name, text, 30, y, color, 20)
+            cls.menu_text.add('start', "Space to Start | I for Instructions", 30, 210, arcade.color.FLORAL_WHITE, 22)
+            cls.menu_text.add('resume', "Space to Resume | I for Instructions", 30, 210, arcade.color.FLORAL_WHITE, 20)
+            cls.menu_text.add('restart', "             R to Restart Game", 30, 170, arcade.color.FLORAL_WHITE, 20)
+        return cls.menu_text
+
+    def on_key_press(self, key: int, modifiers: int) -> None:
+        """
+        Detects Space to start or resume game depending on boolean variable, R to restart if paused, I to show instructions
+        Parameters:
+            - self (TitleView): This class instance
+            - key (arcade.key): key being released
+            - modifiers: extra state of key being released (Ex. Caps Lock or holding Shift/Ctrl)
+        
+        Returns:
+            None
+        """
+        # If menu isn't shown during a game, only show detect Space (start) and I (instructions)
+        # If game is paused, detect Space (resume), I (instructions), and R (restart)
+        if self.paused_game == None:
+            if key == arcade.key.SPACE:
+                if not self.showing_instructions:
+                    game_view = HumanVsAiView()
+                    self.window.set_size(*game_view.window_size())
+                    self.window.show_view(game_view)
+            elif key == arcade.key.I:
+                self.showing_instructions = True
+            elif key == arcade.key.ESCAPE:
+                self.showing_instructions = False
+        else:
+            if key == arcade.key.SPACE:
+                if not self.showing_instructions:
+                    self.window.set_size(*self.paused_game.window_size())
+                    self.window.show_view(self.paused_game)
+            elif key == arcade.key.I:
+                self.showing_instructions = True
+            elif key == arcade.key.ESCAPE:
+                self.showing_instructions = False
+            elif key == arcade.key.R:
+                game_view = HumanVsAiView()
+                self.window.set_size(*game_view.window_size())
+                self.window.show_view(game_view)
+
+class GameOverView(arcade.View):
+    def __init__(self, score, wave, game_over) -> None:
+        """
+        Class constructor, initializes class attributes that are used throughout the class
+        Parameters:
+            - self (TitleView): This class instance
+        Returns:
+            None
+        """
+        super().__init__()
+        #Load title image
+        self.title_image = assets.manager.texture('title_screen.png')
+        # Set our display timer
+        self.display_timer = 1.0
+        # Who lost the game? (1=Player,2=AI)
+        self.game_over = game_over
+        # Is the text visible?
+        self.show_text = False
+        # Game end score
+        self.score = score
+        # Game end wave
+        self.wave = wave
+        # Result, score, wave and return text, built once since they don't change
+        self.text = hud.TextBatch()
+        if self.game_over == 2:
+            if self.wave/3+1 < 4:
+                self.text.add('result', f"   You Beat The Lvl {self.wave//3+1} AI!", 30, 335, arcade.color.MINT_GREEN, 26)
+            else:
+                self.text.add('result', f"     You Survived Every AI!", 30, 335, arcade.color.MINT_GREEN, 26)
+        else:
+            self.text.add('result', f"        The Lvl {self.wave//3+1} AI Wins...", 30, 335, arcade.color.RED_DEVIL, 26)
+        self.text.add('score', f"                 Score: {self.score}", 30, 250, arcade.color.FLORAL_WHITE, 22)
+        self.text.add('wave', f"                 Wave: {self.wave}", 30, 290, arcade.color.FLORAL_WHITE, 22)
+        self.text.add('return', "     ESCAPE to Return to Title", 30, 210, arcade.color.FLORAL_WHITE, 22)
+
+    def on_update(self, delta_time: float) -> None:
+        """
+        This function updates the state of the GameOver menu every tick, used for blinking text on screen
+
+        Parameters:
+            - self (GameOverView): This class instance
+            - delta_time (float): Time since this function last ran
+        
+        Returns:
+            None
+        """
+        # First, count down the time
+        self.display_timer -= delta_time
+
+        # If the timer has run out, toggle text
+        if self.display_timer < 0:
+            self.show_text = not self.show_text
+            # And reset the timer so the text flashes slowly
+            self.display_timer = 2
+
+    def on_draw(self) -> None:
+        """
+        This function renders the state of the GameOver screen including defeat or victory text, final score, wave reached, 
+        and level of AI reached before death. Shows a flashing option to return to menu
+
+        Parameters:
+            - self (GameOverView): This class instance
+        
+        Returns:
+            None
+        """
+        # Start the rendering loop
+        arcade.start_render()
+
+        # Draw a rectangle filled with our title image
+        arcade.draw_texture_rectangle(
+            center_x=SCREEN_WIDTH / 2,
+            center_y=SCREEN_HEIGHT / 2,
+            width=SCREEN_WIDTH,
+            height=SCREEN_HEIGHT,
+            texture=self.title_image,
+        )
+        # Show return text if not blinking out
+        self.text.set_visible('return', self.show_text)
+        self.text.draw()
+
+    def on_key_press(self, key: int, modifiers: int) -> None:
+        """
+        Detects Escape to return to TitleView
+            - self (GameOverView): This class instance
+            - key (arcade.key): key being released
+            - modifiers: extra state of key being released (Ex. Caps Lock or holding Shift/Ctrl)
+        
+        Returns:
+            None
+        """
+        if key == arcade.key.ESCAPE:
+            title_view = TitleView()
+            self.window.show_view(title_view)